@@ -0,0 +1,185 @@
+"""Banco SQLite em memória no lugar do MySQL, para medir insert_data sem servidor.
+
+Traduz o dialeto das consultas de database.py (%s, ON DUPLICATE KEY UPDATE,
+CURDATE(), INSERT IGNORE) e imita o rowcount do MySQL nos upserts (1 por inserção, 2 por
+atualização). Cada ida ao "servidor" (execute, executemany, commit) pode
+esperar uma latência fixa, para simular a rede.
+
+Com um arquivo em 'caminho', várias conexões compartilham o banco como no
+MySQL: a primeira instrução abre uma transação (autocommit desligado) cujo
+snapshot vale até o commit ou rollback. O PoolLocal faz o papel do pool do
+dbpool, para exercitar dbpool.connection() sem servidor.
+"""
+import re, time, sqlite3
+from datetime import date, datetime
+import paginas  # noqa: F401  (coloca core/ no sys.path)
+from base import CARGOS
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+
+SCHEMA = """
+CREATE TABLE concursos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    url TEXT UNIQUE NOT NULL,
+    state TEXT,
+    job TEXT,
+    processed_at TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    pdf_url TEXT,
+    status TEXT DEFAULT 'Aberto',
+    fingerprint TEXT
+);
+CREATE INDEX idx_concursos_status_state ON concursos (status, state);
+CREATE TABLE cargos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome TEXT UNIQUE NOT NULL
+);
+CREATE TABLE concurso_cargos (
+    concurso_id INTEGER NOT NULL REFERENCES concursos (id) ON DELETE CASCADE,
+    cargo_id INTEGER NOT NULL REFERENCES cargos (id),
+    status TEXT DEFAULT 'Aberto',
+    state TEXT,
+    start_date TEXT,
+    PRIMARY KEY (concurso_id, cargo_id)
+);
+CREATE INDEX idx_concurso_cargos_cargo_status_state ON concurso_cargos (cargo_id, status, state);
+CREATE INDEX idx_concurso_cargos_status_start ON concurso_cargos (status, start_date);
+"""
+
+ODKU_RE = re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE(.*)$', re.S | re.I)
+VALUES_RE = re.compile(r'VALUES\((\w+)\)')
+
+_traducoes = {}
+
+def traduzir(sql):
+    traduzida = _traducoes.get(sql)
+    if traduzida is None:
+        traduzida = (sql.replace('%s', '?').replace('CURDATE()', "date('now')")
+                     .replace('INSERT IGNORE', 'INSERT OR IGNORE'))
+        traduzida = ODKU_RE.sub(
+            lambda m: 'ON CONFLICT(url) DO UPDATE SET' + VALUES_RE.sub(r'excluded.\1', m.group(1)),
+            traduzida)
+        _traducoes[sql] = traduzida
+    return traduzida
+
+def _eh_upsert(sql):
+    return 'ON DUPLICATE KEY UPDATE' in sql
+
+class Cursor:
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self._cursor = conexao.db.cursor()
+        self.rowcount = -1
+
+    # Quantas urls das linhas já existem: separa inserções de atualizações
+    def _existentes(self, rows):
+        urls = [row[1] for row in rows]
+        total = 0
+        for inicio in range(0, len(urls), 500):
+            parte = urls[inicio:inicio + 500]
+            self._cursor.execute(
+                f"SELECT COUNT(*) FROM concursos WHERE url IN ({','.join('?' * len(parte))})", parte)
+            total += self._cursor.fetchone()[0]
+        return total
+
+    def execute(self, sql, params=()):
+        self.conexao.ida()
+        self.conexao.iniciar()
+        if _eh_upsert(sql):
+            existentes = self._existentes([params])
+            self._cursor.execute(traduzir(sql), params)
+            self.rowcount = 2 if existentes else 1
+        else:
+            self._cursor.execute(traduzir(sql), params or ())
+            self.rowcount = self._cursor.rowcount
+
+    def executemany(self, sql, seq):
+        self.conexao.ida()
+        self.conexao.iniciar()
+        rows = list(seq)
+        if _eh_upsert(sql):
+            existentes = self._existentes(rows)
+            self._cursor.executemany(traduzir(sql), rows)
+            self.rowcount = len(rows) + existentes
+        else:
+            self._cursor.executemany(traduzir(sql), rows)
+            self.rowcount = self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+class ConexaoLocal:
+    def __init__(self, latencia_ms=0, caminho=None):
+        self.latencia = latencia_ms / 1000
+        self.idas = 0
+        # Usado também pelas threads de consulta da API (uma por vez)
+        self.db = sqlite3.connect(caminho or ':memory:', check_same_thread=False, timeout=30)
+        self.transacional = caminho is not None
+        if self.transacional:
+            # Transações explícitas (iniciar), leitores sem bloquear o escritor
+            self.db.isolation_level = None
+            self.db.execute("PRAGMA journal_mode=WAL")
+        if not self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'concursos'").fetchone():
+            self.db.executescript(SCHEMA)
+            self.db.executemany("INSERT INTO cargos (nome) VALUES (?)", [(nome,) for nome in CARGOS])
+        self.db.commit()
+
+    def ida(self):
+        self.idas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    # Como o InnoDB com autocommit desligado: a primeira instrução abre a transação
+    def iniciar(self):
+        if self.transacional and not self.db.in_transaction:
+            self.db.execute("BEGIN")
+
+    def cursor(self, prepared=False):
+        return Cursor(self)
+
+    def commit(self):
+        self.ida()
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.db.close()
+
+# Imita a PooledMySQLConnection: close() devolve a conexão ao pool sem
+# encerrar a transação (o dbpool é quem faz rollback antes de devolver)
+class ConexaoDoPool:
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, nome):
+        return getattr(self._cnx, nome)
+
+    def close(self):
+        self._pool.livres.append(self._cnx)
+
+# No lugar de dbpool.get_pool(): 'tamanho' conexões ao mesmo arquivo
+class PoolLocal:
+    def __init__(self, caminho, tamanho=1, latencia_ms=0):
+        self.livres = [ConexaoLocal(latencia_ms, caminho) for _ in range(tamanho)]
+
+    def get_connection(self):
+        return ConexaoDoPool(self, self.livres.pop())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Benchmark da API de leitura (core/api.py) contra o banco SQLite local.
+
+Carrega registros sintéticos no banco de bancolocal.py (com latência por ida
+ao "servidor"), sobe a API numa porta livre e dispara rajadas de requisições
+iguais e variadas, como depois de um anúncio grande. Mede requisições por
+segundo, idas ao banco, respostas 304 e o tamanho com e sem gzip. Também
+confere a paginação por cursor e a invalidação do cache pelo db_version.
+
+Uso: python benchmarks/bench_api.py [--registros 5000] [--requisicoes 2000] [--concorrencia 50]
+         [--db-latencia 2] [--ttl 60]
+"""
+import os, time, shutil, asyncio, argparse, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import aiohttp
+from aiohttp import web
+import paginas  # noqa: F401  (coloca core/ no sys.path)
+from bancolocal import ConexaoLocal
+from bench_pipeline import gerar_registros
+import api, database, state
+
+CONSULTAS = [
+    '/concursos?state=SP',
+    '/concursos?cargo=analista de sistemas&state=SP',
+    '/concursos?cargo=analista de sistemas&state=RJ&limite=20',
+    '/concursos?status=Todos&limite=100',
+    '/cargos',
+    '/cargos?state=MG',
+    '/estados',
+]
+
+def carregar_banco(args):
+    conexao = ConexaoLocal(args.db_latencia)
+    database.logger.disabled = True
+    try:
+        database.insert_data(conexao, gerar_registros(args.registros))
+    finally:
+        database.logger.disabled = False
+    conexao.idas = 0
+    return conexao
+
+async def rajada(session, base_url, caminhos, concorrencia, headers=None):
+    semaforo = asyncio.Semaphore(concorrencia)
+    status = {}
+
+    async def uma(caminho):
+        async with semaforo:
+            async with session.get(base_url + caminho, headers=headers) as resp:
+                await resp.read()
+                status[resp.status] = status.get(resp.status, 0) + 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma(c) for c in caminhos))
+    return time.perf_counter() - inicio, status
+
+async def paginar(session, base_url, caminho):
+    vistos = []
+    cursor = None
+    while True:
+        url = base_url + caminho + (f'&cursor={cursor}' if cursor else '')
+        async with session.get(url) as resp:
+            dados = await resp.json()
+        vistos.extend(c['id'] for c in dados['concursos'])
+        cursor = dados['proximo']
+        if not cursor:
+            return vistos
+
+async def executar(args):
+    # O db_version vai para o diretório temporário antes da primeira gravação
+    diretorio = tempfile.mkdtemp(prefix='bench_api_')
+    state.DB_VERSION_FILE = os.path.join(diretorio, 'db_version.json')
+    conexao = carregar_banco(args)
+    # Uma thread: a conexão SQLite é uma só
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    def consultar(func, *params):
+        return loop.run_in_executor(executor, partial(func, conexao, *params))
+
+    api.VERSAO_INTERVALO = 0
+    app = api.criar_app(consultar, api.CacheRespostas(ttl=args.ttl))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base_url = 'http://127.0.0.1:%d' % runner.addresses[0][1]
+    try:
+        async with aiohttp.ClientSession(auto_decompress=False) as session:
+            caminhos = [CONSULTAS[i % len(CONSULTAS)] for i in range(args.requisicoes)]
+
+            duracao, status = await rajada(session, base_url, caminhos, args.concorrencia)
+            print(f"Rajada fria:      {len(caminhos) / duracao:>9.0f} req/s, {conexao.idas} idas ao banco, status {status}")
+
+            idas = conexao.idas
+            duracao, status = await rajada(session, base_url, caminhos, args.concorrencia,
+                                           {'Accept-Encoding': 'gzip'})
+            print(f"Rajada com cache: {len(caminhos) / duracao:>9.0f} req/s, {conexao.idas - idas} idas ao banco, status {status}")
+
+            async with session.get(base_url + CONSULTAS[0]) as resp:
+                etag = resp.headers['ETag']
+                tamanho = len(await resp.read())
+            async with session.get(base_url + CONSULTAS[0], headers={'Accept-Encoding': 'gzip'}) as resp:
+                tamanho_gz = len(await resp.read())
+            duracao, status = await rajada(session, base_url, [CONSULTAS[0]] * args.requisicoes,
+                                           args.concorrencia, {'If-None-Match': etag})
+            print(f"If-None-Match:    {args.requisicoes / duracao:>9.0f} req/s, status {status}")
+            print(f"Corpo de {CONSULTAS[0]}: {tamanho} bytes, {tamanho_gz} com gzip")
+
+            # Gravação no banco: o pipeline atualiza o db_version e o cache cai
+            idas = conexao.idas
+            database.logger.disabled = True
+            database.insert_data(conexao, gerar_registros(10, seed=1))
+            database.logger.disabled = False
+            await rajada(session, base_url, CONSULTAS, 1)
+            print(f"Após uma gravação: {conexao.idas - idas} idas ao banco para {len(CONSULTAS)} consultas (cache invalidado)")
+
+        async with aiohttp.ClientSession() as session:
+            ids = await paginar(session, base_url, '/concursos?status=Todos&limite=37')
+            print(f"Paginação: {len(ids)} concursos, {len(set(ids))} distintos, ordem decrescente: {ids == sorted(ids, reverse=True)}")
+    finally:
+        await runner.cleanup()
+        executor.shutdown(wait=True)
+        conexao.close()
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--registros', type=int, default=5000)
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--concorrencia', type=int, default=50)
+    parser.add_argument('--db-latencia', type=float, default=2, help='latência simulada por ida ao banco (ms)')
+    parser.add_argument('--ttl', type=float, default=60, help='TTL do cache da API (s)')
+    asyncio.run(executar(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Compara normalizar_texto (tabela + str.translate) com a implementação original.
+
+Uso: python benchmarks/bench_normalizar.py [--tamanho 80000] [--paginas 20] [--dir paginas_salvas/]
+"""
+import argparse, timeit
+from paginas import gerar_texto_edital, carregar_paginas
+from normalizer import normalizar_texto, normalizar_texto_referencia
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tamanho', type=int, default=80_000, help='caracteres por edital sintético')
+    parser.add_argument('--paginas', type=int, default=20, help='quantidade de editais sintéticos')
+    parser.add_argument('--dir', help='diretório com páginas .html salvas (usa o texto bruto)')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.dir:
+        textos = [p.decode('utf-8', errors='replace') for p in carregar_paginas(args.dir)]
+    else:
+        textos = [gerar_texto_edital(args.tamanho, seed) for seed in range(args.paginas)]
+
+    # As duas implementações precisam produzir exatamente a mesma saída
+    for texto in textos:
+        assert normalizar_texto(texto) == normalizar_texto_referencia(texto)
+
+    total_chars = sum(len(t) for t in textos)
+    print(f"{len(textos)} textos, {total_chars / 1024:.0f} KB no total")
+
+    resultados = {}
+    for nome, funcao in (('referencia', normalizar_texto_referencia), ('tabela', normalizar_texto)):
+        tempos = timeit.repeat(lambda: [funcao(t) for t in textos], number=1, repeat=args.repeticoes)
+        melhor = min(tempos)
+        resultados[nome] = melhor
+        print(f"{nome:>10}: {melhor * 1000:8.1f} ms  ({total_chars / melhor / 1e6:6.1f} Mchar/s)")
+
+    print(f"speedup: {resultados['referencia'] / resultados['tabela']:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Compara o parsing original (árvore completa) com o parsing restrito de parsing.py.
+
+Uso: python benchmarks/bench_parsing.py [--paginas 20] [--dir paginas_salvas/ | /var/www/vagas/data/arquivo] [--parser lxml]
+"""
+import argparse, time, tracemalloc
+from bs4 import BeautifulSoup
+from paginas import gerar_pagina_concurso, gerar_homepage, carregar_paginas
+import parsing
+
+# Implementações anteriores de process_contest/parse_homepage
+def completo_concurso(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    noticia = soup.find(id='noticia')
+    return (noticia or soup).get_text(separator=' ')
+
+def completo_homepage(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    contests = []
+    for div in soup.find_all('div', attrs={'data-url': True}):
+        rel = div['data-url']
+        a = div.find('a')
+        title = a.get('title', '').strip() if a else 'Sem título'
+        state = div.find('div', class_='cc').get_text(strip=True) or 'NACIONAL'
+        ce = div.find('div', class_='ce')
+        date = 'Em breve'
+        if ce and ce.find('span'):
+            raw = ''.join(ce.find('span').strings)
+            date = raw.replace('Até', '').strip()
+        contests.append({'title': title, 'url': rel, 'state': state, 'date': date})
+    return contests
+
+def restrito_concurso(html):
+    return parsing.extrair_texto_concurso(html)[0]
+
+def restrito_homepage(html):
+    return parsing.parse_listagens(html, '')
+
+def medir(funcao, paginas, repeticoes=3):
+    duracao = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for html in paginas:
+            funcao(html)
+        duracao = min(duracao, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    for html in paginas:
+        funcao(html)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duracao, pico
+
+def relatorio(titulo, casos, paginas):
+    print(f"\n{titulo} ({len(paginas)} páginas, {sum(len(p) for p in paginas) / 1024:.0f} KB)")
+    tempos = {}
+    for nome, funcao in casos:
+        duracao, pico = medir(funcao, paginas)
+        tempos[nome] = duracao
+        print(f"  {nome:>9}: {duracao * 1000 / len(paginas):7.1f} ms/página   pico {pico / 1024 / 1024:6.1f} MB")
+    print(f"  speedup: {tempos['original'] / tempos['restrito']:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paginas', type=int, default=20)
+    parser.add_argument('--dir', help='diretório com páginas de concurso .html salvas ou o arquivo de páginas do scraper')
+    parser.add_argument('--parser', default=parsing.HTML_PARSER, help='backend do BeautifulSoup')
+    args = parser.parse_args()
+    parsing.HTML_PARSER = args.parser
+
+    if args.dir:
+        paginas = carregar_paginas(args.dir)
+    else:
+        paginas = [gerar_pagina_concurso(seed=seed).encode('utf-8') for seed in range(args.paginas)]
+        # Inclui algumas páginas sem #noticia para exercitar o fallback
+        paginas += [gerar_pagina_concurso(seed=seed, com_noticia=False).encode('utf-8') for seed in range(2)]
+
+    for html in paginas:
+        assert ' '.join(completo_concurso(html).split()) == ' '.join(restrito_concurso(html).split())
+
+    relatorio("Página de concurso", [('original', completo_concurso), ('restrito', restrito_concurso)], paginas)
+
+    homepage = [gerar_homepage(500).encode('utf-8')]
+    assert completo_homepage(homepage[0]) == restrito_homepage(homepage[0])
+    relatorio("Página inicial", [('original', completo_homepage), ('restrito', restrito_homepage)], homepage)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Benchmark ponta a ponta das etapas do pipeline, sem site nem MySQL reais.
+
+Sobe o servidor local (servidor.py) com páginas sintéticas ou gravadas
+(fixtures.py) e mede parse_homepage, process_contest, buscar_cargos,
+clean_data e insert_data (contra o banco SQLite de bancolocal.py). Para cada
+etapa informa vazão, latência p50/p99 por chamada e pico de RSS.
+
+Uso: python benchmarks/bench_pipeline.py [--concursos 200] [--latencia 20] [--jitter 10]
+         [--concorrencia 8] [--cpu-workers 8] [--cpu-executor process] [--registros 5000] [--db-latencia 0.5] [--fixtures dir/] [--json saida.json]
+"""
+import os, io, sys, json, math, time, random, shutil, argparse, asyncio, tempfile, resource
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+import paginas  # noqa: F401  (coloca core/ no sys.path)
+from servidor import ServidorLocal
+from bancolocal import ConexaoLocal
+import scraper, state, cleaner, database, estatico
+from parsing import extrair_texto_concurso
+
+# Pico de RSS por etapa: no Linux o pico do processo pode ser zerado
+# (clear_refs); nos outros sistemas o valor é o pico acumulado desde o início
+def reiniciar_pico_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def pico_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 / 1024 if sys.platform == 'darwin' else pico / 1024
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+class Resultados:
+    def __init__(self):
+        self.etapas = []
+
+    def registrar(self, nome, itens, duracao, latencias, rss_mb, pico_exato):
+        self.etapas.append({
+            'etapa': nome,
+            'itens': itens,
+            'segundos': duracao,
+            'itens_por_segundo': itens / duracao if duracao else 0,
+            'p50_ms': percentil(latencias, 50) * 1000,
+            'p99_ms': percentil(latencias, 99) * 1000,
+            'pico_rss_mb': rss_mb,
+            'pico_rss_exato': pico_exato,
+        })
+
+    def imprimir(self):
+        print(f"\n{'etapa':<28}{'itens':>8}{'itens/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'pico RSS':>11}")
+        for e in self.etapas:
+            marca = '' if e['pico_rss_exato'] else '*'
+            print(f"{e['etapa']:<28}{e['itens']:>8}{e['itens_por_segundo']:>11.1f}"
+                  f"{e['p50_ms']:>10.2f}{e['p99_ms']:>10.2f}{e['pico_rss_mb']:>9.1f}MB{marca}")
+        if any(not e['pico_rss_exato'] for e in self.etapas):
+            print("* pico acumulado do processo (o sistema não permite zerar o pico por etapa)")
+
+# Mede uma etapa síncrona: cada item de 'itens' é uma chamada de 'funcao'
+def medir(resultados, nome, funcao, itens, unidades=None):
+    exato = reiniciar_pico_rss()
+    latencias = []
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for item in itens:
+            t0 = time.perf_counter()
+            funcao(item)
+            latencias.append(time.perf_counter() - t0)
+    duracao = time.perf_counter() - inicio
+    resultados.registrar(nome, unidades or len(latencias), duracao, latencias, pico_rss_mb(), exato)
+
+# Estado do scraper isolado em um diretório temporário
+def isolar_estado(diretorio):
+    state.BASE_DIR = diretorio
+    state.DATA_FILE = os.path.join(diretorio, 'data.json')
+    state.PROCESSED_FILE = os.path.join(diretorio, 'processed.json')
+    state.PROCESSED_DB = os.path.join(diretorio, 'processed.db')
+    state.JOURNAL_FILE = os.path.join(diretorio, 'state.jsonl')
+    state.HOMEPAGE_FILE = os.path.join(diretorio, 'homepage.json')
+    state.CHECKPOINT_FILE = os.path.join(diretorio, 'crawl.jsonl')
+    state.EXPIRY_DB = os.path.join(diretorio, 'expiracao.db')
+    state.DB_VERSION_FILE = os.path.join(diretorio, 'db_version.json')
+    estatico.EXPORT_DIR = os.path.join(diretorio, 'static')
+    # Cada página é baixada de verdade: sem cache HTTP nem arquivo de páginas
+    scraper.HTTP_CACHE_ENABLED = False
+    scraper.ARCHIVE_ENABLED = False
+    # Servidor local: sem limite de taxa, só o de concorrência
+    scraper.fetchpolicy.RATE = 0
+
+async def bench_http(resultados, servidor, args):
+    scraper.BASE_URL = servidor.base_url
+    scraper.HOME_URL = f'{servidor.base_url}/concursos/'
+
+    # Os workers do executor de CPU sobem antes da medição
+    scraper.CPU_WORKERS = args.cpu_workers
+    scraper.CPU_EXECUTOR = args.cpu_executor
+    await asyncio.gather(*(scraper.em_worker(len, '') for _ in range(args.cpu_workers)))
+
+    # A política de requisições (criada no primeiro fetch) e o conector
+    # seguem --concorrencia
+    scraper.MAX_CONCURRENCY = scraper.LIMIT_PER_HOST = args.concorrencia
+    async with scraper.make_session(args.concorrencia) as session:
+        # parse_homepage: download + parsing da página inicial
+        exato = reiniciar_pico_rss()
+        latencias = []
+        inicio = time.perf_counter()
+        for _ in range(args.repeticoes_homepage):
+            t0 = time.perf_counter()
+            contests = await scraper.parse_homepage(session)
+            latencias.append(time.perf_counter() - t0)
+        resultados.registrar('parse_homepage', len(latencias), time.perf_counter() - inicio,
+                             latencias, pico_rss_mb(), exato)
+
+        # process_contest: download, parsing, matching e registro no estado
+        scraper.processed = state.open_processed()
+        scraper.data_list = []
+        semaforo = asyncio.Semaphore(args.concorrencia)
+        latencias = []
+
+        async def um(i, c):
+            async with semaforo:
+                t0 = time.perf_counter()
+                await scraper.process_contest(session, c, i, len(contests), log=lambda *_: None)
+                latencias.append(time.perf_counter() - t0)
+
+        exato = reiniciar_pico_rss()
+        inicio = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(um(i, c) for i, c in enumerate(contests, 1)))
+        resultados.registrar(f'process_contest (x{args.concorrencia})', len(latencias),
+                             time.perf_counter() - inicio, latencias, pico_rss_mb(), exato)
+        scraper.processed.close()
+        state._close_journal()
+    return contests
+
+# Registros no formato do data.json: alguns sem data e alguns expirados,
+# como o cleaner encontra na prática
+def gerar_registros(n, seed=0):
+    rnd = random.Random(seed)
+    hoje = date.today()
+    registros = []
+    for i in range(n):
+        sorteio = rnd.random()
+        if sorteio < 0.05:
+            start = None
+        else:
+            dias = rnd.randint(-60, -1) if sorteio < 0.3 else rnd.randint(0, 120)
+            start = (hoje + timedelta(days=dias)).strftime('%d/%m/%Y')
+        registros.append({
+            'title': f'Concurso {i} - Prefeitura',
+            'url': f'https://www.pciconcursos.com.br/noticias/concurso-{i}',
+            'state': rnd.choice(['SP', 'RJ', 'MG', 'NACIONAL']),
+            'job': 'Analista de Sistemas',
+            'all_jobs': ['Analista de Sistemas', 'Técnico em Informática'],
+            'start_date': start,
+            'end_date': None,
+            'processed_at': datetime.now().isoformat(),
+        })
+    return registros
+
+def bench_clean_data(resultados, registros, args):
+    def rodar(_):
+        state.atomic_write_json(registros, state.DATA_FILE)
+        if os.path.exists(state.JOURNAL_FILE):
+            os.remove(state.JOURNAL_FILE)
+        t0 = time.perf_counter()
+        cleaner.clean_data()
+        return time.perf_counter() - t0
+
+    # A regravação do data.json de entrada fica fora da medição
+    exato = reiniciar_pico_rss()
+    latencias = []
+    with redirect_stdout(io.StringIO()):
+        for i in range(args.repeticoes_clean):
+            latencias.append(rodar(i))
+    duracao = sum(latencias)
+    resultados.registrar('clean_data', len(registros) * len(latencias), duracao,
+                         latencias, pico_rss_mb(), exato)
+
+    # Uso contínuo: o índice de vencimento já está montado (a última execução
+    # acima o remontou) e entre uma limpeza e outra só alguns registros vencem
+    ontem = (date.today() - timedelta(days=1)).strftime('%d/%m/%Y')
+    restantes = len(state.load_data())
+    for vencidos in (0, 10):
+        def rodar_incremental(i):
+            for j in range(vencidos):
+                state.append_entry(dict(registros[0], url=f'https://exemplo/vencido-{i}-{j}', start_date=ontem))
+            state._close_journal()
+            t0 = time.perf_counter()
+            cleaner.clean_data()
+            return time.perf_counter() - t0
+
+        exato = reiniciar_pico_rss()
+        with redirect_stdout(io.StringIO()):
+            latencias = [rodar_incremental(i) for i in range(args.repeticoes_clean)]
+        resultados.registrar(f'clean_data (incremental, {vencidos} vencidos)', restantes * len(latencias),
+                             sum(latencias), latencias, pico_rss_mb(), exato)
+
+def bench_insert_data(resultados, registros, args):
+    conexao = ConexaoLocal(args.db_latencia)
+    lotes = [registros[i:i + args.lote] for i in range(0, len(registros), args.lote)]
+    fingerprints = database.load_fingerprints(conexao)
+    database.logger.disabled = True
+    try:
+        medir(resultados, f'insert_data (novos, lote {args.lote})',
+              lambda lote: database.insert_data(conexao, lote, fingerprints=fingerprints),
+              lotes, unidades=len(registros))
+        medir(resultados, 'insert_data (sem mudança)',
+              lambda lote: database.insert_data(conexao, lote, fingerprints=fingerprints),
+              lotes, unidades=len(registros))
+        alterados = [dict(r, title=r['title'] + ' (retificado)') for r in registros]
+        lotes = [alterados[i:i + args.lote] for i in range(0, len(alterados), args.lote)]
+        medir(resultados, 'insert_data (alterados)',
+              lambda lote: database.insert_data(conexao, lote, fingerprints=fingerprints),
+              lotes, unidades=len(registros))
+    finally:
+        database.logger.disabled = False
+    print(f"insert_data: {conexao.idas} idas ao banco local")
+    conexao.close()
+
+async def executar(args):
+    resultados = Resultados()
+    diretorio = tempfile.mkdtemp(prefix='bench_vagas_')
+    try:
+        isolar_estado(diretorio)
+        servidor = await ServidorLocal(args.concursos, args.latencia, args.jitter,
+                                       diretorio_fixtures=args.fixtures).iniciar()
+        try:
+            print(f"Servidor local em {servidor.base_url} com {len(servidor.paginas)} páginas, "
+                  f"latência {args.latencia} ms + até {args.jitter} ms")
+            await bench_http(resultados, servidor, args)
+        finally:
+            await servidor.parar()
+
+        # buscar_cargos sobre o texto já extraído de cada página servida
+        textos = [extrair_texto_concurso(html)[0] for html in servidor.paginas.values()]
+        scraper.get_cargo_matcher()
+        medir(resultados, 'buscar_cargos', scraper.buscar_cargos, textos)
+
+        registros = gerar_registros(args.registros)
+        bench_clean_data(resultados, registros, args)
+        bench_insert_data(resultados, registros, args)
+    finally:
+        scraper.encerrar_cpu_executor()
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concursos', type=int, default=200, help='páginas de concurso sintéticas')
+    parser.add_argument('--latencia', type=float, default=20, help='latência do servidor local por requisição (ms)')
+    parser.add_argument('--jitter', type=float, default=10, help='latência extra aleatória (ms)')
+    parser.add_argument('--concorrencia', type=int, default=scraper.MAX_CONCURRENCY)
+    parser.add_argument('--cpu-workers', type=int, default=scraper.CPU_WORKERS,
+                        help='workers do executor de parsing e matching (0: tudo no event loop)')
+    parser.add_argument('--cpu-executor', choices=['process', 'thread'], default=scraper.CPU_EXECUTOR)
+    parser.add_argument('--fixtures', help='páginas gravadas com fixtures.py em vez das sintéticas')
+    parser.add_argument('--repeticoes-homepage', type=int, default=10)
+    parser.add_argument('--registros', type=int, default=5000, help='registros para clean_data e insert_data')
+    parser.add_argument('--repeticoes-clean', type=int, default=5)
+    parser.add_argument('--lote', type=int, default=50, help='registros por chamada de insert_data')
+    parser.add_argument('--db-latencia', type=float, default=0.5, help='latência simulada por ida ao banco (ms)')
+    parser.add_argument('--json', help='grava os resultados neste arquivo JSON')
+    args = parser.parse_args()
+
+    resultados = asyncio.run(executar(args))
+    resultados.imprimir()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'argumentos': vars(args), 'etapas': resultados.etapas}, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
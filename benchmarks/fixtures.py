@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Grava a página inicial e páginas de concurso reais para reprodução offline.
+
+Uso: python benchmarks/fixtures.py --saida fixtures/ [--concursos 100]
+
+O diretório gravado é servido pelo servidor.py (--fixtures) e usado pelo
+bench_pipeline.py, sempre com as mesmas páginas, sem acessar o site.
+"""
+import os, json, gzip, hashlib, argparse, asyncio
+from urllib.parse import urlsplit
+import paginas  # noqa: F401  (coloca core/ no sys.path)
+import scraper
+from parsing import parse_listagens
+
+MANIFESTO = 'manifest.json'
+
+def _gravar(diretorio, nome, body):
+    with open(os.path.join(diretorio, nome), 'wb') as f:
+        f.write(gzip.compress(body, compresslevel=6))
+
+def _ler(diretorio, nome):
+    with open(os.path.join(diretorio, nome), 'rb') as f:
+        return gzip.decompress(f.read())
+
+# Retorna (página inicial, {caminho: página}). Links absolutos para o site
+# viram relativos, para que o scraper siga o servidor local
+def carregar(diretorio):
+    with open(os.path.join(diretorio, MANIFESTO), 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+    homepage = _ler(diretorio, manifesto['homepage'])
+    homepage = homepage.replace(manifesto['base_url'].encode('utf-8'), b'')
+    paginas_gravadas = {path: _ler(diretorio, nome) for path, nome in manifesto['paginas'].items()}
+    return homepage, paginas_gravadas
+
+async def gravar(diretorio, concursos):
+    os.makedirs(diretorio, exist_ok=True)
+    async with scraper.make_session() as session:
+        homepage = await scraper.fetch(session, scraper.HOME_URL, usar_cache=False)
+        listagens = parse_listagens(homepage, scraper.BASE_URL)[:concursos]
+        manifesto = {'base_url': scraper.BASE_URL, 'homepage': 'homepage.html.gz', 'paginas': {}}
+        _gravar(diretorio, manifesto['homepage'], homepage)
+        for i, c in enumerate(listagens, 1):
+            try:
+                body = await scraper.fetch(session, c['url'], usar_cache=False)
+            except Exception as e:
+                print(f"  -> Erro ao gravar {c['url']}: {e}")
+                continue
+            nome = f"{hashlib.sha256(body).hexdigest()}.html.gz"
+            _gravar(diretorio, nome, body)
+            manifesto['paginas'][urlsplit(c['url']).path] = nome
+            print(f"Gravado {i}/{len(listagens)}: {c['title']}")
+    with open(os.path.join(diretorio, MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    print(f"{len(manifesto['paginas'])} páginas gravadas em {diretorio}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--saida', required=True, help='diretório onde gravar as páginas')
+    parser.add_argument('--concursos', type=int, default=100, help='páginas de concurso a gravar')
+    args = parser.parse_args()
+    asyncio.run(gravar(args.saida, args.concursos))
+
+if __name__ == '__main__':
+    main()
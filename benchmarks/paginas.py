@@ -0,0 +1,96 @@
+import os, sys, random
+
+# Permite importar os módulos de core/ como o pipeline faz (cwd=core)
+CORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core')
+if CORE_DIR not in sys.path:
+    sys.path.insert(0, CORE_DIR)
+
+PARAGRAFOS = [
+    "O Prefeito Municipal, no uso de suas atribuições legais, torna pública a realização de Concurso Público "
+    "para provimento de cargos efetivos do Quadro de Pessoal, nos termos da Lei Complementar nº 123/2024.",
+    "As inscrições estarão abertas no período de 10/03/2025 a 14/04/2025, exclusivamente via Internet, "
+    "no endereço eletrônico da organizadora — mediante pagamento da taxa de R$ 85,00 (oitenta e cinco reais).",
+    "Cargo: Técnico em Informática – Vagas: 02 (duas) + CR – Escolaridade: Ensino Médio completo com curso "
+    "técnico em informática – Vencimento: R$ 3.254,18 – Jornada: 40h semanais.",
+    "Cargo: Analista de Sistemas – Requisito: Graduação em Ciência da Computação, Sistemas de Informação ou "
+    "áreas afins, com registro no órgão de classe; salário inicial de R$ 7.812,40.",
+    "A prova objetiva terá caráter eliminatório e classificatório, com 40 (quarenta) questões de múltipla "
+    "escolha sobre Língua Portuguesa, Matemática, Noções de Informática e Conhecimentos Específicos.",
+    "Os candidatos com deficiência (PcD) concorrerão a 5% das vagas, conforme o Decreto nº 9.508/2018; "
+    "a condição deverá ser comprovada por laudo médico emitido nos últimos 12 (doze) meses.",
+    "Cargo: Auxiliar Administrativo, Motorista, Agente Comunitário de Saúde, Enfermeiro, Professor de "
+    "Educação Básica I – “Anexo II” apresenta as atribuições e o conteúdo programático de cada função.",
+]
+
+# Gera um texto com o tamanho aproximado de um edital real (padrão ~80 KB)
+def gerar_texto_edital(tamanho=80_000, seed=0):
+    rnd = random.Random(seed)
+    partes = []
+    total = 0
+    while total < tamanho:
+        paragrafo = rnd.choice(PARAGRAFOS)
+        partes.append(paragrafo)
+        total += len(paragrafo) + 2
+    return '\n\n'.join(partes)
+
+# Página de concurso no formato do pciconcursos, com #noticia no meio de
+# bastante marcação de navegação e propaganda em volta
+def gerar_pagina_concurso(tamanho=80_000, seed=0, com_noticia=True):
+    rnd = random.Random(seed)
+    menu = ''.join(
+        f'<li class="menu-item"><a href="/concursos/{uf}/" title="Concursos {uf}">{uf}</a></li>'
+        for uf in ('AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+                   'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO')
+    )
+    lateral = ''.join(
+        f'<div class="box"><a href="/noticias/{i}">Notícia relacionada {i}</a><p>Resumo {i}</p></div>'
+        for i in range(rnd.randint(150, 250))
+    )
+    paragrafos = ''.join(f'<p>{p}</p>' for p in gerar_texto_edital(tamanho, seed).split('\n\n'))
+    wrapper = 'id="noticia"' if com_noticia else 'class="conteudo"'
+    return (
+        '<!DOCTYPE html><html><head><title>Concurso</title>'
+        '<script>var x = 1;</script><style>.a{color:red}</style></head><body>'
+        f'<header><ul class="menu">{menu}</ul></header>'
+        f'<main><article><div {wrapper}>{paragrafos}'
+        '<p><a href="/arquivos/edital.pdf">Edital de Abertura (PDF)</a></p></div></article>'
+        f'<aside>{lateral}</aside></main><footer>pciconcursos</footer></body></html>'
+    )
+
+# Página inicial com n listagens no formato div[data-url]
+def gerar_homepage(n=500, seed=0, base_url=''):
+    rnd = random.Random(seed)
+    ufs = ['SP', 'RJ', 'MG', 'PR', 'RS', 'BA', 'NACIONAL']
+    itens = []
+    for i in range(n):
+        dia = rnd.randint(1, 28)
+        itens.append(
+            f'<div class="ca" data-url="{base_url}/noticias/concurso-{i}">'
+            f'<a href="{base_url}/noticias/concurso-{i}" title="Concurso {i} - Prefeitura">Prefeitura {i}</a>'
+            f'<div class="cc">{rnd.choice(ufs)}</div>'
+            f'<div class="cd">Cargos diversos<span>Superior</span></div>'
+            f'<div class="ce"><span>Até {dia:02d}/12/2099</span></div></div>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><title>Concursos</title></head><body>'
+        '<div id="topo">' + '<p>propaganda</p>' * 200 + '</div>'
+        '<div id="concursos">' + ''.join(itens) + '</div></body></html>'
+    )
+
+# Lê páginas salvas de um diretório (*.html), se informado. Também aceita o
+# arquivo de páginas do scraper (core/archive.py): um corpus real e fixo
+def carregar_paginas(diretorio):
+    if os.path.isdir(os.path.join(diretorio, 'objetos')):
+        return carregar_arquivo(diretorio)
+    paginas = []
+    for nome in sorted(os.listdir(diretorio)):
+        if nome.endswith('.html'):
+            with open(os.path.join(diretorio, nome), 'rb') as f:
+                paginas.append(f.read())
+    return paginas
+
+def carregar_arquivo(diretorio):
+    from archive import PageArchive
+    arquivo = PageArchive(diretorio)
+    chaves = sorted({r['sha256'] for r in arquivo.entradas().values()})
+    return [arquivo.ler(chave) for chave in chaves]
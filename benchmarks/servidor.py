@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Servidor aiohttp local no lugar do pciconcursos, para benchmarks reproduzíveis.
+
+Serve a página inicial e as páginas de concurso sintéticas (paginas.py) ou
+gravadas (fixtures.py), com latência configurável por requisição.
+
+Uso: python benchmarks/servidor.py [--porta 8765] [--concursos 200] [--latencia 50] [--fixtures dir/]
+"""
+import argparse, asyncio, hashlib, random
+from aiohttp import web
+from paginas import gerar_homepage, gerar_pagina_concurso
+import fixtures
+
+class ServidorLocal:
+    def __init__(self, concursos=200, latencia_ms=0, jitter_ms=0, tamanho=80_000,
+                 diretorio_fixtures=None, host='127.0.0.1', porta=0, seed=0):
+        self.latencia = latencia_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.host = host
+        self.porta = porta
+        self.rnd = random.Random(seed)
+        self.requisicoes = 0
+        self.runner = None
+        # As páginas são geradas (ou lidas) uma vez, antes de medir qualquer coisa
+        if diretorio_fixtures:
+            self.homepage, self.paginas = fixtures.carregar(diretorio_fixtures)
+        else:
+            self.homepage = gerar_homepage(concursos).encode('utf-8')
+            self.paginas = {
+                # Algumas páginas sem #noticia, para exercitar o fallback
+                f'/noticias/concurso-{i}': gerar_pagina_concurso(tamanho, seed=i, com_noticia=i % 10 != 9).encode('utf-8')
+                for i in range(concursos)
+            }
+        self.etags = {path: f'"{hashlib.sha1(body).hexdigest()}"' for path, body in self.paginas.items()}
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.porta}'
+
+    async def _esperar(self):
+        if self.latencia or self.jitter:
+            await asyncio.sleep(self.latencia + self.rnd.uniform(0, self.jitter))
+
+    async def _homepage(self, request):
+        self.requisicoes += 1
+        await self._esperar()
+        return web.Response(body=self.homepage, content_type='text/html', charset='utf-8')
+
+    async def _pagina(self, request):
+        self.requisicoes += 1
+        await self._esperar()
+        path = request.path
+        body = self.paginas.get(path)
+        if body is None:
+            raise web.HTTPNotFound()
+        etag = self.etags[path]
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=body, content_type='text/html', charset='utf-8', headers={'ETag': etag})
+
+    async def iniciar(self):
+        app = web.Application()
+        app.router.add_get('/concursos/', self._homepage)
+        app.router.add_get('/{caminho:.+}', self._pagina)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.porta)
+        await site.start()
+        if not self.porta:
+            self.porta = self.runner.addresses[0][1]
+        return self
+
+    async def parar(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+async def _servir(args):
+    servidor = await ServidorLocal(args.concursos, args.latencia, args.jitter,
+                                   diretorio_fixtures=args.fixtures, porta=args.porta).iniciar()
+    print(f"Servindo {len(servidor.paginas)} concursos em {servidor.base_url}/concursos/ (Ctrl+C para parar)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.parar()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--concursos', type=int, default=200, help='listagens sintéticas na página inicial')
+    parser.add_argument('--latencia', type=float, default=0, help='latência por requisição (ms)')
+    parser.add_argument('--jitter', type=float, default=0, help='latência extra aleatória (ms)')
+    parser.add_argument('--fixtures', help='diretório gravado com fixtures.py (em vez das páginas sintéticas)')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""API JSON de leitura para o site: concursos por estado, cargo e status.
+
+Uso (no diretório core): python api.py [--host 127.0.0.1] [--port 8080]
+
+As respostas ficam em um cache em memória (TTL de API_CACHE_TTL segundos)
+e consultas idênticas simultâneas viram uma só ida ao banco. O cache é
+descartado assim que o pipeline grava algo no banco (database.py atualiza
+o arquivo db_version). Cada resposta tem ETag (304 para If-None-Match) e é
+servida em gzip a quem aceita.
+"""
+import os, json, gzip, time, base64, asyncio, hashlib, argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import partial
+from aiohttp import web
+from dotenv import load_dotenv
+import dbpool, consultas, metrics, state
+from base import CARGOS
+from normalizer import normalizar_texto
+
+load_dotenv()
+
+HOST = os.getenv('API_HOST', '127.0.0.1')
+PORT = int(os.getenv('API_PORT', 8080))
+CACHE_TTL = float(os.getenv('API_CACHE_TTL', 60))
+CACHE_MAX_ENTRIES = max(1, int(os.getenv('API_CACHE_MAX_ENTRIES', 1000)))
+# Threads para as consultas (o driver MySQL é bloqueante); não adianta
+# passar do tamanho do pool de conexões
+DB_WORKERS = max(1, min(int(os.getenv('API_DB_WORKERS', 4)), dbpool.POOL_SIZE))
+# Respostas menores que isso não compensam o gzip
+GZIP_MIN_BYTES = 1024
+# Intervalo mínimo entre duas conferências do db_version
+VERSAO_INTERVALO = 1.0
+METRICS_INTERVALO = 60
+
+STATUS_VALIDOS = ('Aberto', 'Encerrado', 'Cancelado')
+
+# Nome na dimensão cargos (semeada com base.CARGOS) pelo texto normalizado
+# como no matcher do scraper: sem acentos, pontuação nem diferença de caixa
+CARGOS_NORMALIZADOS = {normalizar_texto(nome): nome for nome in CARGOS}
+
+def _json_padrao(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} não é serializável")
+
+# Corpo pronto para servir: JSON, versão gzip (se compensar) e ETag,
+# calculados uma vez quando a resposta entra no cache. O corpo em gzip é
+# outra representação e tem o próprio ETag forte (sufixo -gzip)
+class Resposta:
+    __slots__ = ('corpo', 'gz', 'etag', 'etag_gz', 'expira')
+
+    def __init__(self, dados, ttl):
+        self.corpo = json.dumps(dados, ensure_ascii=False, default=_json_padrao, separators=(',', ':')).encode('utf-8')
+        self.gz = gzip.compress(self.corpo, compresslevel=6) if len(self.corpo) >= GZIP_MIN_BYTES else None
+        digest = hashlib.blake2b(self.corpo, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        self.etag_gz = f'"{digest}-gzip"'
+        self.expira = time.monotonic() + ttl
+
+# Cache LRU com TTL. Uma chave ausente é gerada por uma única tarefa, que
+# todas as requisições iguais aguardam (a tarefa não é cancelada se o
+# cliente que a iniciou desconectar). Uma mudança no db_version descarta
+# tudo, inclusive o que estava sendo gerado com os dados antigos
+class CacheRespostas:
+    def __init__(self, ttl=CACHE_TTL, maximo=CACHE_MAX_ENTRIES, versao_path=None):
+        self.ttl = ttl
+        self.maximo = maximo
+        self.versao_path = versao_path or state.DB_VERSION_FILE
+        self.entradas = OrderedDict()
+        self.em_voo = {}
+        self.versao = self._ler_versao()
+        self.conferido = time.monotonic()
+
+    def _ler_versao(self):
+        try:
+            return os.stat(self.versao_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _conferir_versao(self):
+        agora = time.monotonic()
+        if agora - self.conferido < VERSAO_INTERVALO:
+            return
+        self.conferido = agora
+        versao = self._ler_versao()
+        if versao != self.versao:
+            self.versao = versao
+            self.invalidar()
+
+    def invalidar(self):
+        metrics.incr('api_cache_invalidations_total')
+        self.entradas.clear()
+
+    async def obter(self, chave, gerar):
+        self._conferir_versao()
+        entrada = self.entradas.get(chave)
+        if entrada is not None and entrada.expira > time.monotonic():
+            self.entradas.move_to_end(chave)
+            metrics.incr('api_cache_total', resultado='hit')
+            return entrada
+
+        tarefa = self.em_voo.get(chave)
+        if tarefa is None:
+            metrics.incr('api_cache_total', resultado='miss')
+            tarefa = asyncio.ensure_future(self._gerar(chave, gerar, self.versao))
+            self.em_voo[chave] = tarefa
+            tarefa.add_done_callback(partial(self._concluida, chave))
+        else:
+            metrics.incr('api_cache_total', resultado='agrupada')
+        return await asyncio.shield(tarefa)
+
+    async def _gerar(self, chave, gerar, versao):
+        entrada = Resposta(await gerar(), self.ttl)
+        if versao == self.versao:
+            self.entradas[chave] = entrada
+            self.entradas.move_to_end(chave)
+            while len(self.entradas) > self.maximo:
+                self.entradas.popitem(last=False)
+        return entrada
+
+    def _concluida(self, chave, tarefa):
+        if self.em_voo.get(chave) is tarefa:
+            del self.em_voo[chave]
+        # Marca a exceção como vista mesmo se todos os clientes já saíram
+        if not tarefa.cancelled():
+            tarefa.exception()
+
+def _erro(mensagem):
+    return web.HTTPBadRequest(text=json.dumps({'erro': mensagem}, ensure_ascii=False),
+                              content_type='application/json')
+
+# Cursor opaco para a próxima página (o id do último concurso entregue)
+def codificar_cursor(concurso_id):
+    return base64.urlsafe_b64encode(str(concurso_id).encode('ascii')).rstrip(b'=').decode('ascii')
+
+def decodificar_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii'))
+    except (ValueError, UnicodeDecodeError):
+        raise _erro("cursor inválido")
+
+def _status(query):
+    status = query.get('status', consultas.STATUS_ABERTO).strip().capitalize()
+    if status == 'Todos':
+        return None
+    if status not in STATUS_VALIDOS:
+        raise _erro(f"status deve ser um de {', '.join(STATUS_VALIDOS)} ou Todos")
+    return status
+
+# Um cargo fora da lista continua sem resultados (nenhum nome igual no banco)
+def _cargo(query):
+    cargo = normalizar_texto(query.get('cargo', ''))
+    return CARGOS_NORMALIZADOS.get(cargo, cargo) or None
+
+def _state(query):
+    return query.get('state', '').strip().upper() or None
+
+def _limite(query):
+    try:
+        limite = int(query.get('limite', consultas.LIMITE_PADRAO))
+    except ValueError:
+        raise _erro("limite deve ser um número")
+    if not 1 <= limite <= consultas.LIMITE_MAXIMO:
+        raise _erro(f"limite deve estar entre 1 e {consultas.LIMITE_MAXIMO}")
+    return limite
+
+def _aceita(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or etag in (t.strip() for t in if_none_match.split(','))
+
+# A representação (identidade ou gzip) é escolhida antes: o 304 compara o
+# If-None-Match com o ETag da que seria enviada
+def responder(request, entrada):
+    gz = entrada.gz is not None and 'gzip' in request.headers.get('Accept-Encoding', '')
+    headers = {
+        'ETag': entrada.etag_gz if gz else entrada.etag,
+        'Cache-Control': f'public, max-age={int(CACHE_TTL)}',
+        'Vary': 'Accept-Encoding',
+    }
+    if _aceita(request, headers['ETag']):
+        return web.Response(status=304, headers=headers)
+    if gz:
+        headers['Content-Encoding'] = 'gzip'
+    return web.Response(body=entrada.gz if gz else entrada.corpo, content_type='application/json',
+                        charset='utf-8', headers=headers)
+
+CACHE = web.AppKey('cache', CacheRespostas)
+CONSULTAR = web.AppKey('consultar', object)
+
+# GET /concursos?cargo=analista de dados&state=SP&status=Aberto&limite=50&cursor=...
+async def listar_concursos(request):
+    query = request.query
+    cargo = _cargo(query)
+    estado = _state(query)
+    status = _status(query)
+    limite = _limite(query)
+    antes_de = decodificar_cursor(query['cursor']) if query.get('cursor') else None
+    consultar = request.app[CONSULTAR]
+
+    async def gerar():
+        concursos = await consultar(consultas.buscar_concursos, cargo, estado, status, antes_de, limite)
+        proximo = codificar_cursor(concursos[-1]['id']) if len(concursos) == limite else None
+        return {'concursos': concursos, 'proximo': proximo}
+
+    chave = ('concursos', cargo, estado, status, antes_de, limite)
+    return responder(request, await request.app[CACHE].obter(chave, gerar))
+
+# GET /cargos?state=SP&status=Aberto: total de concursos por cargo
+async def listar_cargos(request):
+    estado = _state(request.query)
+    status = _status(request.query)
+    consultar = request.app[CONSULTAR]
+
+    async def gerar():
+        linhas = await consultar(consultas.contagem_por_cargo, estado, status)
+        return {'cargos': [{'cargo': nome, 'total': total} for nome, total in linhas]}
+
+    chave = ('cargos', estado, status)
+    return responder(request, await request.app[CACHE].obter(chave, gerar))
+
+# GET /estados?status=Aberto: total de concursos por estado
+async def listar_estados(request):
+    status = _status(request.query)
+    consultar = request.app[CONSULTAR]
+
+    async def gerar():
+        linhas = await consultar(consultas.contagem_por_estado, status)
+        return {'estados': [{'state': nome, 'total': total} for nome, total in linhas]}
+
+    chave = ('estados', status)
+    return responder(request, await request.app[CACHE].obter(chave, gerar))
+
+@web.middleware
+async def medir(request, handler):
+    rota = request.match_info.route.resource.canonical if request.match_info.route.resource else 'outra'
+    try:
+        with metrics.span('api_request', rota=rota):
+            resposta = await handler(request)
+    except web.HTTPException as e:
+        metrics.incr('api_responses_total', rota=rota, status=e.status)
+        raise
+    metrics.incr('api_responses_total', rota=rota, status=resposta.status)
+    return resposta
+
+# Consultas pelo pool do MySQL, em threads
+def consultar_pool(executor):
+    def consultar(func, *args):
+        return asyncio.get_running_loop().run_in_executor(executor, partial(dbpool.run, func, *args))
+    return consultar
+
+# 'consultar(func, *args)' roda uma função de consultas.py com uma conexão e
+# devolve um awaitable; os benchmarks passam um que usa o banco local
+def criar_app(consultar=None, cache=None):
+    app = web.Application(middlewares=[medir])
+    app[CACHE] = cache or CacheRespostas()
+    if consultar is None:
+        executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix='api-db')
+        consultar = consultar_pool(executor)
+
+        async def encerrar_executor(app):
+            executor.shutdown(wait=True)
+        app.on_cleanup.append(encerrar_executor)
+    app[CONSULTAR] = consultar
+    app.router.add_get('/concursos', listar_concursos)
+    app.router.add_get('/cargos', listar_cargos)
+    app.router.add_get('/estados', listar_estados)
+    if metrics.ENABLED:
+        app.cleanup_ctx.append(_exportar_metricas)
+    return app
+
+# Serviço de longa duração: as métricas são regravadas periodicamente
+async def _exportar_metricas(app):
+    async def laco():
+        while True:
+            await asyncio.sleep(METRICS_INTERVALO)
+            metrics.exportar()
+    tarefa = asyncio.ensure_future(laco())
+    yield
+    tarefa.cancel()
+    metrics.exportar()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API JSON de leitura dos concursos")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args(argv)
+    metrics.iniciar('api')
+    web.run_app(criar_app(), host=args.host, port=args.port)
+    return True
+
+if __name__ == '__main__':
+    main()
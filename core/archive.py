@@ -0,0 +1,88 @@
+import os, json, gzip, hashlib
+from datetime import datetime
+from state import BASE_DIR
+
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'arquivo')
+# Arquivamento das páginas de concurso baixadas (PAGE_ARCHIVE=0 desliga)
+ARCHIVE_ENABLED = os.getenv('PAGE_ARCHIVE', '1') != '0'
+
+# Arquivo das páginas de concurso, endereçado pelo conteúdo: cada corpo é
+# guardado uma única vez em objetos/<2 primeiros hex>/<sha256>.gz, e o
+# index.jsonl (só acrescenta) liga cada url ao hash da página e aos dados da
+# listagem. Na leitura do índice, o último registro de cada url vence.
+class PageArchive:
+    def __init__(self, diretorio=ARCHIVE_DIR):
+        self.diretorio = diretorio
+        self.objetos = os.path.join(diretorio, 'objetos')
+        self.indice_path = os.path.join(diretorio, 'index.jsonl')
+        self._indice = None
+        self._indice_file = None
+        os.makedirs(self.objetos, exist_ok=True)
+
+    @staticmethod
+    def chave(body):
+        return hashlib.sha256(body).hexdigest()
+
+    def caminho(self, chave):
+        return os.path.join(self.objetos, chave[:2], f"{chave}.gz")
+
+    # url -> registro mais recente do índice
+    def entradas(self):
+        if self._indice is None:
+            self._indice = {}
+            if os.path.exists(self.indice_path):
+                with open(self.indice_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.endswith('\n'):
+                            break
+                        try:
+                            registro = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self._indice[registro['url']] = registro
+        return self._indice
+
+    def _gravar_objeto(self, chave, body):
+        path = self.caminho(chave)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=6))
+        os.replace(tmp_path, path)
+
+    # Guarda a página e, se o conteúdo ou a listagem mudou, registra no índice
+    def guardar(self, c, body):
+        chave = self.chave(body)
+        self._gravar_objeto(chave, body)
+        anterior = self.entradas().get(c['url'])
+        registro = {
+            'url': c['url'],
+            'sha256': chave,
+            'title': c['title'],
+            'state': c['state'],
+            'date': c['date'],
+        }
+        if anterior and all(anterior.get(k) == v for k, v in registro.items()):
+            return chave
+        registro['archived_at'] = datetime.now().isoformat()
+        if self._indice_file is None:
+            self._indice_file = open(self.indice_path, 'a', encoding='utf-8')
+        self._indice_file.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        self._indice_file.flush()
+        self._indice[c['url']] = registro
+        return chave
+
+    def ler(self, chave):
+        return ler_objeto(self.caminho(chave))
+
+    def close(self):
+        if self._indice_file is not None:
+            self._indice_file.close()
+            self._indice_file = None
+
+# Função solta para ser usada nos workers do reprocessamento
+def ler_objeto(path):
+    with open(path, 'rb') as f:
+        return gzip.decompress(f.read())
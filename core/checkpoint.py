@@ -0,0 +1,136 @@
+import os, json
+from datetime import datetime
+import state
+
+# Checkpoint da execução do crawl (crawl.jsonl): a primeira linha guarda as
+# listagens lidas da página inicial e quais delas seriam processadas; cada
+# linha seguinte registra a mudança de estado de uma url. O arquivo só é
+# apagado quando a execução termina, então um processo morto no meio do
+# crawl (VM preemptada, kill) deixa o suficiente para --resume continuar.
+PENDENTE = 'pendente'
+EM_ANDAMENTO = 'em_andamento'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+
+class Checkpoint:
+    def __init__(self, path, inicio, listagens, pendentes, reprocessar):
+        self.path = path
+        self.inicio = inicio
+        self.listagens = listagens
+        self.pendentes = pendentes
+        self.reprocessar = set(reprocessar)
+        # url -> (estado, resultado de process_contest)
+        self.estados = {url: (PENDENTE, None) for url in pendentes}
+        self._arquivo = None
+
+    def _cabecalho(self):
+        return {
+            'op': 'inicio',
+            'inicio': self.inicio,
+            'listagens': self.listagens,
+            'pendentes': self.pendentes,
+            'reprocessar': sorted(self.reprocessar),
+        }
+
+    # Grava cabeçalho e estados atuais de uma vez (temporário + rename) e
+    # deixa o arquivo aberto para anexar as próximas mudanças
+    def _regravar(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self._cabecalho(), ensure_ascii=False) + '\n')
+            for url, (estado, resultado) in self.estados.items():
+                if estado != PENDENTE:
+                    f.write(json.dumps({'op': 'estado', 'url': url, 'estado': estado,
+                                        'resultado': resultado}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._arquivo = open(self.path, 'a', encoding='utf-8')
+
+    def _registrar(self, url, estado, resultado=None, sincronizar=False):
+        self.estados[url] = (estado, resultado)
+        if self._arquivo is None:
+            return
+        self._arquivo.write(json.dumps({'op': 'estado', 'url': url, 'estado': estado,
+                                        'resultado': resultado}) + '\n')
+        self._arquivo.flush()
+        if sincronizar:
+            os.fsync(self._arquivo.fileno())
+
+    # Começo de uma execução nova: substitui o checkpoint anterior, se houver
+    @classmethod
+    def novo(cls, listagens, pendentes, reprocessar, path=None):
+        ponto = cls(path or state.CHECKPOINT_FILE, datetime.now().isoformat(),
+                    listagens, [c['url'] for c in pendentes], reprocessar)
+        ponto._regravar()
+        return ponto
+
+    # Checkpoint deixado por uma execução interrompida, ou None. Uma linha
+    # incompleta no final (processo morto durante a escrita) é ignorada
+    @classmethod
+    def carregar(cls, path=None):
+        path = path or state.CHECKPOINT_FILE
+        ponto = None
+        for registro in state.read_journal(path):
+            op = registro.get('op')
+            if op == 'inicio':
+                ponto = cls(path, registro['inicio'], registro['listagens'],
+                            registro['pendentes'], registro.get('reprocessar', []))
+            elif op == 'estado' and ponto is not None and registro['url'] in ponto.estados:
+                ponto.estados[registro['url']] = (registro['estado'], registro.get('resultado'))
+        if ponto is not None:
+            ponto._regravar()
+        return ponto
+
+    @staticmethod
+    def existe(path=None):
+        return os.path.exists(path or state.CHECKPOINT_FILE)
+
+    def iniciar(self, url):
+        self._registrar(url, EM_ANDAMENTO)
+
+    # Só a conclusão vai para o disco na hora (fsync): um 'em andamento'
+    # perdido equivale a pendente, mas uma conclusão perdida faria a url ser
+    # baixada de novo
+    def concluir(self, url, resultado):
+        self._registrar(url, FALHOU if resultado is None else CONCLUIDO, resultado, sincronizar=True)
+
+    def contagem(self):
+        contagem = {}
+        for estado, _ in self.estados.values():
+            contagem[estado] = contagem.get(estado, 0) + 1
+        return contagem
+
+    # Listagens que a execução retomada ainda precisa processar e as urls
+    # que devem ser lidas mesmo já constando em processed (alteradas na
+    # página inicial, ou interrompidas depois de registradas). Uma conclusão
+    # com entrada que não chegou ao estado local ('salvas') é refeita
+    def a_retomar(self, salvas):
+        por_url = {c['url']: c for c in self.listagens}
+        restantes = []
+        forcar = set(self.reprocessar)
+        for url in self.pendentes:
+            estado, resultado = self.estados[url]
+            if estado == CONCLUIDO and not (resultado and url not in salvas):
+                continue
+            restantes.append(por_url[url])
+            if estado != PENDENTE:
+                forcar.add(url)
+        return restantes, forcar
+
+    # Resultado de process_contest de cada url já processada (None = falha)
+    def resultados(self):
+        return {url: resultado for url, (estado, resultado) in self.estados.items()
+                if estado in (CONCLUIDO, FALHOU)}
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    # Execução concluída: não há mais o que retomar
+    def encerrar(self):
+        self.fechar()
+        if os.path.exists(self.path):
+            os.remove(self.path)
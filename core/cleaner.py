@@ -1,58 +1,123 @@
-import json
 from datetime import datetime
+from functools import lru_cache
+from state import DATA_FILE
+import state, metrics
 
-DATA_FILE = '/var/www/vagas/data/data.json'
+# Resultados de classificar_entrada
+MANTER = 'manter'
+SEM_DATA = 'sem_data'
+EXPIRADO = 'expirado'
 
+# As datas se repetem muito entre os registros (prazos dos mesmos dias):
+# cada string é convertida pelo strptime uma vez só
+@lru_cache(maxsize=4096)
 def str_to_date(date_str: str):
     return datetime.strptime(date_str, "%d/%m/%Y").date()
 
-def clean_data():
-    """Remove registros sem start_date ou com datas expiradas"""
+def classificar_entrada(entry, today):
+    """Decide se um registro fica ou sai da base"""
+    start_date = entry.get('start_date')
+
+    # Remove se não tiver start_date
+    if not start_date:
+        return SEM_DATA
+
+    # Remove se a data já passou
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            data_list = json.load(f)
-    except FileNotFoundError:
-        print(f"Arquivo {DATA_FILE} não encontrado")
-        return
-    
-    today = datetime.today().date()
-    original_count = len(data_list)
-    
+        if str_to_date(start_date) < today:
+            return EXPIRADO
+    except Exception as e:
+        print(f"Erro ao processar data '{start_date}': {e}")
+        # Em caso de erro, mantém o registro
+
+    return MANTER
+
+def limpar_lista(data_list, today=None):
+    """Retorna (registros mantidos, removidos sem data, removidos expirados)"""
+    today = today or datetime.today().date()
     cleaned_list = []
     removed_empty = 0
     removed_expired = 0
-    
+
     for entry in data_list:
-        start_date = entry.get('start_date')
-        
-        # Remove se não tiver start_date
-        if not start_date:
+        resultado = classificar_entrada(entry, today)
+        if resultado == SEM_DATA:
             removed_empty += 1
-            continue
-            
-        # Remove se a data já passou
-        try:
-            if str_to_date(start_date) < today:
-                removed_expired += 1
-                continue
-        except Exception as e:
-            print(f"Erro ao processar data '{start_date}': {e}")
-            # Em caso de erro, mantém o registro
+        elif resultado == EXPIRADO:
+            removed_expired += 1
+        else:
             cleaned_list.append(entry)
-            continue
-            
-        cleaned_list.append(entry)
-    
-    # Salva dados limpos
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cleaned_list, f, ensure_ascii=False, indent=2)
-    
+
+    metrics.incr('clean_removed_total', removed_empty, motivo=SEM_DATA)
+    metrics.incr('clean_removed_total', removed_expired, motivo=EXPIRADO)
+    return cleaned_list, removed_empty, removed_expired
+
+# Limpeza pelo índice de vencimento (state.indice_expiracao): só os registros
+# vencidos desde a última limpeza são consultados. Se nada venceu, o data.json
+# nem é lido; se algo venceu, cada registro ganha uma marca 'remove' no
+# journal (state.remove_entries) e o snapshot é compactado no fim, então só
+# as limpezas que de fato removem algo regravam o data.json. Com 'data_list'
+# a lista em memória também perde os registros. Retorna (a base, ou None se
+# ela não precisou ser lida, registros originais, removidos sem data,
+# removidos expirados)
+def limpar_base(data_list=None, today=None):
+    with metrics.span('clean_data'):
+        return _limpar_base(data_list, today or datetime.today().date())
+
+def _limpar_base(data_list, today):
+    indice = state.indice_expiracao()
+
+    # Primeira limpeza com o índice, ou data.json trocado por fora: uma
+    # passada completa, que também remonta o índice
+    if not indice.em_dia(state.DATA_FILE):
+        if data_list is None:
+            data_list = state.load_data()
+        original_count = len(data_list)
+        data_list[:], removed_empty, removed_expired = limpar_lista(data_list, today)
+        state.compact(data_list)
+        indice.reconstruir(data_list, state.DATA_FILE)
+        return data_list, original_count, removed_empty, removed_expired
+
+    original_count = len(data_list) if data_list is not None else len(indice)
+    # O índice guarda o vencimento de cada url: 0 é registro sem data
+    vencidos = indice.vencidos(today)
+    if not vencidos:
+        return data_list, original_count, 0, 0
+
+    removed_empty = sum(1 for vence in vencidos.values() if vence == 0)
+    removed_expired = len(vencidos) - removed_empty
+    state.remove_entries(vencidos)
+    if data_list is not None:
+        data_list[:] = [entry for entry in data_list if entry['url'] not in vencidos]
+    state.compact(data_list if data_list is not None else state.load_data())
+
+    metrics.incr('clean_removed_total', removed_empty, motivo=SEM_DATA)
+    metrics.incr('clean_removed_total', removed_expired, motivo=EXPIRADO)
+    return data_list, original_count, removed_empty, removed_expired
+
+def print_summary(original_count, remaining_count, removed_empty, removed_expired):
     print("\n=== Limpeza Concluída ===")
     print(f"Registros originais: {original_count}")
     print(f"Removidos sem data: {removed_empty}")
     print(f"Removidos expirados: {removed_expired}")
     print(f"Total removidos: {removed_empty + removed_expired}")
-    print(f"Registros restantes: {len(cleaned_list)}")
+    print(f"Registros restantes: {remaining_count}")
+
+def clean_data():
+    """Remove registros sem start_date ou com datas expiradas"""
+    if not state.exists():
+        print(f"Arquivo {DATA_FILE} não encontrado")
+        return
+
+    # Os shards estáticos não dependem desta limpeza: a exportação do scraper
+    # já deixa de fora os concursos com start_date passada
+    _, original_count, removed_empty, removed_expired = limpar_base()
+    removidos = removed_empty + removed_expired
+    print_summary(original_count, original_count - removidos, removed_empty, removed_expired)
 
 if __name__ == '__main__':
-    clean_data()
\ No newline at end of file
+    metrics.iniciar('cleaner')
+    try:
+        clean_data()
+    finally:
+        metrics.exportar()
@@ -0,0 +1,101 @@
+# Consultas de leitura mais comuns do site (concursos por cargo, estado e
+# status). O filtro por cargo parte da concurso_cargos, cujo índice
+# (cargo_id, status, state) já traz as linhas na ordem de concurso_id: com os
+# três filtros, a página sai do índice sem varrer nem ordenar a tabela.
+
+STATUS_ABERTO = 'Aberto'
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+COLUNAS = "c.id, c.title, c.url, c.state, c.job, c.start_date, c.end_date, c.pdf_url, c.status"
+
+def _dicts(cursor):
+    nomes = [coluna[0] for coluna in cursor.description]
+    return [dict(zip(nomes, linha)) for linha in cursor.fetchall()]
+
+def _placeholders(valores):
+    return ', '.join(['%s'] * len(valores))
+
+# Concursos do mais novo para o mais antigo. Paginação por cursor: 'antes_de'
+# é o id do último concurso da página anterior (sem OFFSET, cada página custa
+# o mesmo). Cada concurso vem com a lista 'cargos'
+def buscar_concursos(conn, cargo=None, state=None, status=STATUS_ABERTO, antes_de=None, limite=LIMITE_PADRAO):
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    filtros = []
+    params = []
+    if cargo:
+        origem = ("concurso_cargos cc JOIN cargos g ON g.id = cc.cargo_id "
+                  "JOIN concursos c ON c.id = cc.concurso_id")
+        tabela, id_coluna = 'cc', 'cc.concurso_id'
+        filtros.append("g.nome = %s")
+        params.append(cargo)
+    else:
+        origem = "concursos c"
+        tabela, id_coluna = 'c', 'c.id'
+    if status:
+        filtros.append(f"{tabela}.status = %s")
+        params.append(status)
+    if state:
+        filtros.append(f"{tabela}.state = %s")
+        params.append(state)
+    if antes_de is not None:
+        filtros.append(f"{id_coluna} < %s")
+        params.append(int(antes_de))
+    where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+    params.append(limite)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT {COLUNAS} FROM {origem} {where} ORDER BY {id_coluna} DESC LIMIT %s", params)
+        concursos = _dicts(cursor)
+        cargos = _cargos_por_concurso(cursor, [c['id'] for c in concursos])
+    finally:
+        cursor.close()
+    for concurso in concursos:
+        concurso['cargos'] = cargos.get(concurso['id'], [])
+    return concursos
+
+def _cargos_por_concurso(cursor, ids):
+    if not ids:
+        return {}
+    cursor.execute(
+        "SELECT cc.concurso_id, g.nome FROM concurso_cargos cc JOIN cargos g ON g.id = cc.cargo_id "
+        f"WHERE cc.concurso_id IN ({_placeholders(ids)}) ORDER BY cc.concurso_id, g.id", ids)
+    cargos = {}
+    for concurso_id, nome in cursor.fetchall():
+        cargos.setdefault(concurso_id, []).append(nome)
+    return cargos
+
+# [(cargo, total)] dos concursos com o status (None: todos) e, se informado,
+# o estado pedido, só pelo índice da concurso_cargos
+def contagem_por_cargo(conn, state=None, status=STATUS_ABERTO):
+    filtros = []
+    params = []
+    if status:
+        filtros.append("cc.status = %s")
+        params.append(status)
+    if state:
+        filtros.append("cc.state = %s")
+        params.append(state)
+    where = f"WHERE {' AND '.join(filtros)} " if filtros else ""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT g.nome, COUNT(*) AS total FROM concurso_cargos cc JOIN cargos g ON g.id = cc.cargo_id "
+            f"{where}GROUP BY g.id, g.nome ORDER BY total DESC, g.nome", params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+# [(estado, total)] dos concursos com o status pedido (None: todos), pelo
+# índice (status, state) da tabela concursos
+def contagem_por_estado(conn, status=STATUS_ABERTO):
+    where, params = ("WHERE status = %s ", (status,)) if status else ("", ())
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT state, COUNT(*) AS total FROM concursos {where}"
+            "GROUP BY state ORDER BY total DESC, state", params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
@@ -0,0 +1,153 @@
+import os, signal, asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import schedule
+import mysql.connector
+import scraper, pipeline, metrics
+from database import logger
+
+# Verificação rápida da página inicial (só concursos novos) a cada
+# DAEMON_POLL_MINUTES e reconciliação completa (limpeza da base, sincronização
+# e expiração no banco) a cada DAEMON_FULL_HOURS. Os intervalos variam
+# aleatoriamente em ± *_JITTER minutos para não bater sempre no mesmo horário.
+POLL_MINUTES = max(1, int(os.getenv('DAEMON_POLL_MINUTES', 5)))
+POLL_JITTER = max(0, int(os.getenv('DAEMON_POLL_JITTER', 1)))
+FULL_HOURS = max(1, int(os.getenv('DAEMON_FULL_HOURS', 6)))
+FULL_JITTER = max(0, int(os.getenv('DAEMON_FULL_JITTER', 15)))
+
+# Intervalo de agendamento em minutos, com jitter quando houver
+def agendar(agendador, minutos, jitter, tarefa):
+    minimo = max(1, minutos - jitter)
+    maximo = minutos + jitter
+    if maximo > minimo:
+        return agendador.every(minimo).to(maximo).minutes.do(tarefa)
+    return agendador.every(minimo).minutes.do(tarefa)
+
+class Daemon:
+    """Mantém um único event loop com a sessão HTTP, o pool do banco, as
+    fingerprints e o matcher de cargos carregados entre as rodadas"""
+
+    def __init__(self):
+        self.agendador = schedule.Scheduler()
+        # Uma rodada por vez: as duas mexem no mesmo estado do scraper
+        self.rodando = asyncio.Lock()
+        self.completa_pendente = False
+        self.parar = asyncio.Event()
+        self.tarefas = set()
+        self.session = None
+        self.executor = None
+        self.fingerprints = None
+
+    async def iniciar(self):
+        scraper.get_cargo_matcher()
+        scraper.init_state()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+        self.fingerprints = await pipeline.preparar_banco(self.executor)
+        self.session = scraper.make_session()
+
+    async def encerrar(self):
+        if self.tarefas:
+            await asyncio.gather(*self.tarefas, return_exceptions=True)
+        if self.session is not None:
+            await self.session.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        scraper.encerrar_cpu_executor()
+
+    async def rodada(self, reconciliar, retomar=False):
+        tipo = "completa" if reconciliar else "rápida"
+        inicio = datetime.now()
+        logger.info(f"Iniciando verificação {tipo}")
+        try:
+            ok = await pipeline.run_pipeline(self.session, self.executor, self.fingerprints, reconciliar,
+                                             retomar=retomar)
+        except Exception as e:
+            # Uma rodada com erro não derruba o daemon; a próxima tenta de novo
+            logger.error(f"Erro inesperado na verificação {tipo}: {e}")
+            ok = False
+        duracao = (datetime.now() - inicio).total_seconds()
+        logger.info(f"Verificação {tipo} {'concluída' if ok else 'falhou'} em {duracao:.1f}s")
+
+    async def verificacao_rapida(self):
+        # Se outra rodada ainda está rodando, esta é descartada: a próxima
+        # verificação rápida já vem em poucos minutos
+        if self.rodando.locked():
+            logger.info("Verificação rápida ignorada: rodada anterior ainda em andamento")
+            return
+        async with self.rodando:
+            await self.rodada(reconciliar=False)
+
+    async def verificacao_completa(self, retomar=False):
+        # A completa é rara demais para ser descartada: espera a rodada atual
+        # terminar, mas não acumula mais de uma na fila
+        if self.completa_pendente:
+            logger.info("Verificação completa ignorada: já existe uma aguardando")
+            return
+        self.completa_pendente = True
+        try:
+            async with self.rodando:
+                self.completa_pendente = False
+                await self.rodada(reconciliar=True, retomar=retomar)
+        finally:
+            self.completa_pendente = False
+
+    # O schedule chama funções síncronas; cada disparo vira uma tarefa no loop
+    def disparar(self, corrotina):
+        def tarefa():
+            if self.parar.is_set():
+                return
+            t = asyncio.get_running_loop().create_task(corrotina())
+            self.tarefas.add(t)
+            t.add_done_callback(self.tarefas.discard)
+        return tarefa
+
+    def sinalizar_parada(self):
+        logger.info("Sinal de parada recebido, encerrando após a rodada atual...")
+        self.parar.set()
+
+    async def executar(self):
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sinal, self.sinalizar_parada)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        await self.iniciar()
+        try:
+            agendar(self.agendador, POLL_MINUTES, POLL_JITTER, self.disparar(self.verificacao_rapida))
+            agendar(self.agendador, FULL_HOURS * 60, FULL_JITTER, self.disparar(self.verificacao_completa))
+            logger.info(f"Daemon iniciado: verificação rápida a cada {POLL_MINUTES}±{POLL_JITTER} min, completa a cada {FULL_HOURS}h±{FULL_JITTER} min")
+
+            # Primeira rodada completa logo na partida, continuando o crawl
+            # interrompido se o processo anterior morreu no meio de um; depois
+            # segue a agenda
+            self.disparar(lambda: self.verificacao_completa(retomar=True))()
+            while not self.parar.is_set():
+                self.agendador.run_pending()
+                espera = self.agendador.idle_seconds
+                espera = 1 if espera is None else min(max(espera, 0.1), 60)
+                try:
+                    await asyncio.wait_for(self.parar.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.agendador.clear()
+            await self.encerrar()
+            logger.info("Daemon encerrado")
+
+async def executar_daemon():
+    # Criado dentro do loop: Lock/Event ficam presos ao loop corrente
+    await Daemon().executar()
+
+def main():
+    metrics.iniciar('daemon')
+    try:
+        asyncio.run(executar_daemon())
+    except mysql.connector.Error as err:
+        logger.error(f"Erro no banco de dados ao iniciar o daemon: {err}")
+        return False
+    return True
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,15 @@
 import json
+import hashlib
 import mysql.connector
 from datetime import datetime, date
-from dotenv import load_dotenv
 import os
 import logging
 import sys
-
-# Carregar variáveis do .env
-load_dotenv()
+import state
+import dbpool
+import schema
+import metrics
+from dbpool import DB_CONFIG
 
 # Configuração do logging SIMPLIFICADA
 def setup_logging():
@@ -32,25 +34,21 @@ def setup_logging():
 
 logger = setup_logging()
 
-# Configuração do banco de dados
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME"),
-    "port": int(os.getenv("DB_PORT", 3306))
-}
+# Registros por INSERT multi-row; cada lote é commitado separadamente
+INSERT_CHUNK_SIZE = max(1, int(os.getenv("DB_INSERT_CHUNK_SIZE", 500)))
 
 # Funções principais
 def load_data(json_file=None):
-    if json_file is None:
-        json_file = "/var/www/vagas/data/data.json"
-    
     try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            logger.info(f"Dados carregados com sucesso do arquivo {json_file}. Total de registros: {len(data)}")
-            return data
+        if json_file is None:
+            # Lê o snapshot data.json somado ao journal de estado do scraper
+            json_file = state.DATA_FILE
+            data = state.load_data()
+        else:
+            with open(json_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        logger.info(f"Dados carregados com sucesso do arquivo {json_file}. Total de registros: {len(data)}")
+        return data
     except FileNotFoundError:
         logger.error(f"Arquivo {json_file} não encontrado")
         raise
@@ -71,70 +69,316 @@ def determine_status_and_date(item):
         logger.warning(f"Data de início inválida para '{item.get('title', 'título não informado')}': {item.get('start_date')} - Marcado como Cancelado")
         return None, "Cancelado"
 
-def insert_data(conn, data):
+# Prazo final do concurso; datas inválidas ficam em branco
+def parse_end_date(item):
+    try:
+        return datetime.strptime(item["end_date"], "%d/%m/%Y").date()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+UPSERT_SQL = """
+INSERT INTO concursos (title, url, state, job, processed_at, start_date, end_date, pdf_url, status, fingerprint)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    title = VALUES(title),
+    state = VALUES(state),
+    job = VALUES(job),
+    processed_at = VALUES(processed_at),
+    start_date = VALUES(start_date),
+    end_date = VALUES(end_date),
+    pdf_url = VALUES(pdf_url),
+    status = VALUES(status),
+    fingerprint = VALUES(fingerprint)
+"""
+
+# Impressão digital do conteúdo de um concurso: se nenhum destes campos mudou,
+# o upsert não teria efeito e pode ser pulado
+def compute_fingerprint(item):
+    campos = [
+        item.get("title"),
+        item.get("state"),
+        item.get("job"),
+        item.get("start_date"),
+        item.get("end_date"),
+        item.get("pdf_url"),
+        item.get("all_jobs"),
+    ]
+    return hashlib.sha1(json.dumps(campos, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def build_row(item):
+    processed_at = datetime.fromisoformat(item["processed_at"])
+    start_date, status = determine_status_and_date(item)
+    return (
+        item["title"],
+        item["url"],
+        item["state"],
+        item.get("job"),
+        processed_at,
+        start_date,
+        parse_end_date(item),
+        item.get("pdf_url"),
+        status,
+        compute_fingerprint(item)
+    )
+
+# Carrega url -> fingerprint de todos os concursos em uma única consulta
+def load_fingerprints(conn):
     cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT url, fingerprint FROM concursos")
+        metrics.incr('db_round_trips_total', op='select')
+        return {url: fingerprint for url, fingerprint in cursor.fetchall()}
+    finally:
+        cursor.close()
 
-    sql = """
-    INSERT INTO concursos (title, url, state, job, processed_at, start_date, pdf_url, status)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    ON DUPLICATE KEY UPDATE
-        title = VALUES(title),
-        state = VALUES(state),
-        job = VALUES(job),
-        processed_at = VALUES(processed_at),
-        start_date = VALUES(start_date),
-        pdf_url = VALUES(pdf_url),
-        status = VALUES(status);
-    """
+# Cargos de cada concurso: all_jobs, ou só o job em registros antigos
+def cargos_do_item(item):
+    return list(dict.fromkeys(item.get("all_jobs") or ([item["job"]] if item.get("job") else [])))
 
-    inserted_count = 0
-    updated_count = 0
-    
-    for item in data:
+# Nome do cargo -> id na tabela cargos, lido uma vez por processo. Um cargo
+# acrescentado a base.CARGOS depois da migração é inserido na primeira vez
+# que aparece em um concurso
+_cargo_ids = {}
+
+def cargo_ids(cursor, nomes):
+    if not _cargo_ids:
+        cursor.execute("SELECT id, nome FROM cargos")
+        metrics.incr('db_round_trips_total', op='select')
+        _cargo_ids.update((nome, cargo_id) for cargo_id, nome in cursor.fetchall())
+    faltando = sorted(set(nomes).difference(_cargo_ids))
+    if faltando:
+        cursor.executemany("INSERT IGNORE INTO cargos (nome) VALUES (%s)", [(nome,) for nome in faltando])
+        cursor.execute(f"SELECT id, nome FROM cargos WHERE nome IN ({', '.join(['%s'] * len(faltando))})", faltando)
+        metrics.incr('db_round_trips_total', 2, op='cargos')
+        _cargo_ids.update((nome, cargo_id) for cargo_id, nome in cursor.fetchall())
+    return _cargo_ids
+
+INSERT_CONCURSO_CARGOS_SQL = """
+INSERT INTO concurso_cargos (concurso_id, cargo_id, status, state, start_date)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Regrava o mapeamento concurso -> cargos dos concursos do lote, na mesma
+# transação do upsert: uma consulta dos ids pelas urls, um DELETE e um
+# INSERT multi-row, qualquer que seja o tamanho do lote
+def sync_concurso_cargos(cursor, rows, cargos_por_url):
+    if not rows:
+        return
+    urls = [row[1] for row in rows]
+    cursor.execute(f"SELECT id, url FROM concursos WHERE url IN ({', '.join(['%s'] * len(urls))})", urls)
+    ids = {url: concurso_id for concurso_id, url in cursor.fetchall()}
+    metrics.incr('db_round_trips_total', op='select')
+    if not ids:
+        return
+    cursor.execute(
+        f"DELETE FROM concurso_cargos WHERE concurso_id IN ({', '.join(['%s'] * len(ids))})",
+        list(ids.values()))
+    metrics.incr('db_round_trips_total', op='delete')
+
+    nomes = {nome for url in ids for nome in cargos_por_url.get(url, ())}
+    mapa = cargo_ids(cursor, nomes)
+    linhas = []
+    for title, url, state, job, processed_at, start_date, end_date, pdf_url, status, fingerprint in rows:
+        if url in ids:
+            linhas.extend((ids[url], mapa[nome], status, state, start_date)
+                          for nome in cargos_por_url.get(url, ()) if nome in mapa)
+    if linhas:
+        cursor.executemany(INSERT_CONCURSO_CARGOS_SQL, linhas)
+        metrics.incr('db_round_trips_total', op='insert_cargos')
+
+# Um lote vira um único INSERT multi-row (o executemany do conector reescreve
+# o INSERT ... VALUES). O rowcount do MySQL conta 1 por inserção e 2 por
+# atualização, então as URLs que já existiam separam as duas contagens.
+def insert_chunk(cursor, rows, fingerprints, cargos_por_url):
+    existing = sum(1 for row in rows if row[1] in fingerprints)
+    cursor.executemany(UPSERT_SQL, rows)
+    metrics.incr('db_round_trips_total', op='upsert')
+    inserted = len(rows) - existing
+    updated = (cursor.rowcount - inserted) // 2
+    sync_concurso_cargos(cursor, rows, cargos_por_url)
+    return inserted, updated
+
+# Fallback de um lote que falhou: grava linha a linha para isolar o registro
+# problemático sem perder o resto do lote. Usa um statement preparado, que é
+# reaproveitado enquanto a conexão do pool viver
+def insert_rows_individually(conn, rows, fingerprints, cargos_por_url):
+    cursor = dbpool.prepared_cursor(conn, UPSERT_SQL)
+    inserted = updated = 0
+    gravadas = []
+    for row in rows:
         try:
-            processed_at = datetime.fromisoformat(item["processed_at"])
-            start_date, status = determine_status_and_date(item)
-
-            cursor.execute(sql, (
-                item["title"],
-                item["url"],
-                item["state"],
-                item.get("job"),
-                processed_at,
-                start_date,
-                item.get("pdf_url"),
-                status
-            ))
-            
+            cursor.execute(UPSERT_SQL, row)
+            metrics.incr('db_round_trips_total', op='upsert')
             if cursor.rowcount == 1:
-                inserted_count += 1
+                inserted += 1
             elif cursor.rowcount == 2:
-                updated_count += 1
-                
+                updated += 1
+            gravadas.append(row)
+        except Exception as e:
+            logger.error(f"Erro ao processar item '{row[0]}': {e}")
+    # Sem o mapeamento a fingerprint não é atualizada: o concurso volta a
+    # ser enviado no próximo sync
+    cursor_cargos = conn.cursor()
+    try:
+        sync_concurso_cargos(cursor_cargos, gravadas, cargos_por_url)
+        fingerprints.update((row[1], row[-1]) for row in gravadas)
+    except Exception as e:
+        logger.error(f"Erro ao gravar os cargos de {len(gravadas)} concursos: {e}")
+    finally:
+        cursor_cargos.close()
+    conn.commit()
+    metrics.incr('db_round_trips_total', op='commit')
+    return inserted, updated
+
+# Expiração em uma única instrução baseada em conjunto. O filtro por status
+# (em vez de NOT IN) permite usar o índice (status, start_date) com um range
+# scan; start_date < CURDATE() já exclui as datas nulas.
+EXPIRE_SQL = """
+UPDATE concursos
+SET status = 'Encerrado'
+WHERE (status = 'Aberto' OR status IS NULL)
+AND start_date < CURDATE()
+"""
+
+# A cópia do status no mapeamento de cargos segue a mesma regra, pelo índice
+# (status, start_date) da concurso_cargos
+EXPIRE_CARGOS_SQL = """
+UPDATE concurso_cargos
+SET status = 'Encerrado'
+WHERE status = 'Aberto'
+AND start_date < CURDATE()
+"""
+
+# 'fingerprints' (url -> fingerprint) pode ser reaproveitado entre chamadas;
+# é atualizado com o que for gravado. Com expire=True a expiração vai na
+# mesma transação do último lote, sem uma ida extra só para ela.
+def insert_data(conn, data, chunk_size=None, fingerprints=None, expire=False):
+    with metrics.span('insert_data'):
+        inserted, updated = _insert_data(conn, data, chunk_size, fingerprints, expire)
+    metrics.incr('db_rows_total', inserted, resultado='inserido')
+    metrics.incr('db_rows_total', updated, resultado='atualizado')
+    return inserted, updated
+
+def _insert_data(conn, data, chunk_size, fingerprints, expire):
+    chunk_size = chunk_size or INSERT_CHUNK_SIZE
+    if fingerprints is None:
+        fingerprints = load_fingerprints(conn)
+    cursor = conn.cursor()
+
+    # Uma linha por URL (a última vence), como aconteceria com upserts em série
+    rows = {}
+    cargos_por_url = {}
+    for item in data:
+        try:
+            row = build_row(item)
+            rows.pop(row[1], None)
+            rows[row[1]] = row
+            cargos_por_url[row[1]] = cargos_do_item(item)
         except Exception as e:
             logger.error(f"Erro ao processar item '{item.get('title', 'título não informado')}': {e}")
-            continue
+    # Só vão para o banco os concursos novos ou com conteúdo alterado
+    changed = [row for row in rows.values() if fingerprints.get(row[1]) != row[-1]]
+    unchanged_count = len(rows) - len(changed)
+    metrics.incr('db_rows_total', unchanged_count, resultado='sem_alteracao')
 
-    conn.commit()
-    cursor.close()
-    
-    logger.info(f"Processamento concluído - Inseridos: {inserted_count}, Atualizados: {updated_count}")
+    chunks = [changed[start:start + chunk_size] for start in range(0, len(changed), chunk_size)]
+    if expire and not chunks:
+        chunks = [[]]
+
+    inserted_count = 0
+    updated_count = 0
+    expired_count = 0
+
+    try:
+        for index, chunk in enumerate(chunks):
+            last = index == len(chunks) - 1
+            try:
+                inserted, updated = insert_chunk(cursor, chunk, fingerprints, cargos_por_url) if chunk else (0, 0)
+                if expire and last:
+                    cursor.execute(EXPIRE_SQL)
+                    expired_count = cursor.rowcount
+                    cursor.execute(EXPIRE_CARGOS_SQL)
+                    metrics.incr('db_round_trips_total', 2, op='expire')
+                conn.commit()
+                metrics.incr('db_round_trips_total', op='commit')
+                fingerprints.update((row[1], row[-1]) for row in chunk)
+            except Exception as e:
+                conn.rollback()
+                # Cargos inseridos nesta transação foram desfeitos junto
+                _cargo_ids.clear()
+                logger.warning(f"Falha no lote de {len(chunk)} registros ({e}), repetindo linha a linha")
+                inserted, updated = insert_rows_individually(conn, chunk, fingerprints, cargos_por_url)
+                if expire and last:
+                    expired_count = update_expired_concursos(conn)
+            inserted_count += inserted
+            updated_count += updated
+    finally:
+        cursor.close()
+
+    if inserted_count or updated_count or expired_count:
+        sinalizar_alteracao()
+
+    logger.info(f"Processamento concluído - Inseridos: {inserted_count}, Atualizados: {updated_count}, Sem alteração: {unchanged_count}")
+    if expire:
+        logger.info(f"Análise de status concluída - {expired_count} concursos marcados como 'Encerrado'")
+    return inserted_count, updated_count
+
+# Avisa os leitores (o cache da API) de que o conteúdo do banco mudou. Uma
+# falha aqui só atrasa a invalidação até o TTL do cache
+def sinalizar_alteracao():
+    try:
+        os.makedirs(os.path.dirname(state.DB_VERSION_FILE), exist_ok=True)
+        state.atomic_write_json({'alterado_em': datetime.now().isoformat()}, state.DB_VERSION_FILE, indent=None)
+    except OSError as e:
+        logger.warning(f"Não foi possível atualizar {state.DB_VERSION_FILE}: {e}")
+
+# Apaga do banco os concursos que saíram da base local sem expirar: um
+# concurso buscado de novo que não tem mais cargos de TI, ou que já venceu.
+# Os cargos vão junto (ON DELETE CASCADE) e os triggers ajustam as contagens
+def remover_concursos(conn, urls, fingerprints=None):
+    urls = list(urls)
+    if not urls:
+        return 0
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM concursos WHERE url IN ({', '.join(['%s'] * len(urls))})", urls)
+        removidos = cursor.rowcount
+        conn.commit()
+        metrics.incr('db_round_trips_total', 2, op='delete')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    if fingerprints is not None:
+        for url in urls:
+            fingerprints.pop(url, None)
+    if removidos:
+        sinalizar_alteracao()
+    logger.info(f"Remoção concluída - {removidos} concursos removidos do banco")
+    return removidos
+
+# Aplica as remoções pendentes (state.add_removed). Uma url que voltou para
+# a base local depois de removida (o concurso ganhou cargos de novo) fica
+def aplicar_remocoes(conn, data, fingerprints=None):
+    pendentes = state.load_removed()
+    if not pendentes:
+        return 0
+    removidos = remover_concursos(conn, pendentes.difference(item['url'] for item in data), fingerprints)
+    state.clear_removed(pendentes)
+    return removidos
 
 def update_expired_concursos(conn):
     cursor = conn.cursor()
     
-    sql_update = """
-    UPDATE concursos 
-    SET status = 'Encerrado'
-    WHERE start_date < CURDATE() 
-    AND status NOT IN ('Encerrado', 'Cancelado')
-    AND start_date IS NOT NULL
-    """
-    
     try:
-        cursor.execute(sql_update)
+        cursor.execute(EXPIRE_SQL)
         rows_affected = cursor.rowcount
+        cursor.execute(EXPIRE_CARGOS_SQL)
         conn.commit()
+        if rows_affected:
+            sinalizar_alteracao()
         
         logger.info(f"Análise de status concluída - {rows_affected} concursos marcados como 'Encerrado'")
         
@@ -159,10 +403,19 @@ def analyze_and_update_status(conn):
     
     return rows_updated
 
+# Resumo lido da tabela de contagens mantida por triggers (schema.py); se ela
+# ainda não existir, cai no GROUP BY sobre a tabela inteira
 def get_status_summary(conn):
     cursor = conn.cursor()
     
     sql = """
+    SELECT status, total
+    FROM concursos_status_counts
+    WHERE total > 0
+    ORDER BY total DESC
+    """
+
+    sql_fallback = """
     SELECT 
         CASE 
             WHEN status IS NULL THEN 'Sem Status'
@@ -175,7 +428,10 @@ def get_status_summary(conn):
     """
     
     try:
-        cursor.execute(sql)
+        try:
+            cursor.execute(sql)
+        except mysql.connector.ProgrammingError:
+            cursor.execute(sql_fallback)
         results = cursor.fetchall()
 
         logger.info("Resumo dos status dos concursos:")
@@ -194,15 +450,17 @@ def main():
     
     try:
         logger.info("Conectando ao banco de dados...")
-        conn = mysql.connector.connect(**DB_CONFIG)
-        logger.info("Conexão estabelecida com sucesso")
-        logger.info("Carregando dados do arquivo JSON...")
-        data = load_data()
-        logger.info("Inserindo/atualizando dados no banco...")
-        insert_data(conn, data)
-        analyze_and_update_status(conn)
-        get_status_summary(conn)
-        logger.info("Processamento concluído com sucesso!")
+        with dbpool.connection() as conn:
+            logger.info("Conexão estabelecida com sucesso")
+            schema.migrate(conn)
+            logger.info("Carregando dados do arquivo JSON...")
+            data = load_data()
+            logger.info("Inserindo/atualizando dados e expirando concursos no banco...")
+            insert_data(conn, data, expire=True)
+            aplicar_remocoes(conn, data)
+            get_status_summary(conn)
+            logger.info("Processamento concluído com sucesso!")
+        logger.info("Conexão devolvida ao pool")
     except mysql.connector.Error as err:
         logger.error(f"Erro no banco de dados: {err}")
         return False
@@ -212,13 +470,13 @@ def main():
     except Exception as e:
         logger.error(f"Erro inesperado: {e}")
         return False
-    finally:
-        if 'conn' in locals() and conn.is_connected():
-            conn.close()
-            logger.info("Conexão com o banco encerrada")
     
     logger.info("=== FIM DA EXECUÇÃO ===")
     return True
 
 if __name__ == "__main__":
-    success = main()
\ No newline at end of file
+    metrics.iniciar('database')
+    try:
+        success = main()
+    finally:
+        metrics.exportar()
\ No newline at end of file
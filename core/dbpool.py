@@ -0,0 +1,124 @@
+import os
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+import mysql.connector
+from mysql.connector import pooling
+from dotenv import load_dotenv
+
+# Carregar variáveis do .env
+load_dotenv()
+
+logger = logging.getLogger('concursos_db')
+
+# Configuração do banco de dados
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "localhost"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "database": os.getenv("DB_NAME"),
+    "port": int(os.getenv("DB_PORT", 3306))
+}
+
+POOL_NAME = "vagas"
+POOL_SIZE = max(1, int(os.getenv("DB_POOL_SIZE", 5)))
+
+# Tentativas (com backoff exponencial e jitter) para obter uma conexão ou
+# repetir uma operação depois de uma queda de conexão
+RETRY_ATTEMPTS = max(1, int(os.getenv("DB_RETRY_ATTEMPTS", 5)))
+RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", 0.5))
+RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", 15))
+
+# Erros que indicam conexão perdida ou indisponível (vale tentar de novo)
+RETRYABLE_ERRORS = (mysql.connector.errors.OperationalError,
+                    mysql.connector.errors.InterfaceError,
+                    mysql.connector.errors.PoolError)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def backoff_delay(attempt):
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def _retry(descricao, func, attempts=None):
+    attempts = attempts or RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except RETRYABLE_ERRORS as err:
+            if attempt == attempts:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"{descricao} falhou ({err}); nova tentativa {attempt + 1}/{attempts} em {delay:.1f}s")
+            time.sleep(delay)
+
+# Pool compartilhado pelo processo inteiro (scraper, pipeline, daemon, API).
+# pool_reset_session=False mantém os prepared statements vivos entre usos;
+# por isso connection() encerra a transação aberta (rollback, com ou sem
+# erro) antes de devolver a conexão: quem grava faz o próprio commit.
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _retry("Criação do pool de conexões", lambda: pooling.MySQLConnectionPool(
+                pool_name=POOL_NAME,
+                pool_size=POOL_SIZE,
+                pool_reset_session=False,
+                **DB_CONFIG
+            ))
+            logger.info(f"Pool de conexões criado ({POOL_SIZE} conexões)")
+        return _pool
+
+def _raw(conn):
+    return getattr(conn, '_cnx', conn)
+
+# Garante que a conexão está viva antes de entregá-la; se o servidor
+# derrubou a conexão ociosa, reconecta e descarta os statements preparados
+def _health_check(conn):
+    raw = _raw(conn)
+    try:
+        raw.ping(reconnect=False)
+    except mysql.connector.Error:
+        raw.reconnect(attempts=RETRY_ATTEMPTS, delay=RETRY_BASE_DELAY)
+        raw._vagas_statements = {}
+
+@contextmanager
+def connection():
+    conn = _retry("Obtenção de conexão do pool", get_pool().get_connection)
+    try:
+        _retry("Verificação da conexão", lambda: _health_check(conn))
+        yield conn
+    finally:
+        # Sem isso uma leitura bem-sucedida devolveria a conexão com a
+        # transação (REPEATABLE READ) aberta: o próximo a usá-la leria um
+        # snapshot antigo, e o lock de metadados seguraria os ALTER TABLE
+        try:
+            conn.rollback()
+        except mysql.connector.Error:
+            pass
+        conn.close()
+
+# Executa func(conn, *args) com uma conexão do pool, repetindo em outra
+# conexão se a atual cair no meio (as operações do pipeline são upserts
+# idempotentes, então repetir é seguro)
+def run(func, *args, **kwargs):
+    def tentativa():
+        with connection() as conn:
+            return func(conn, *args, **kwargs)
+    return _retry(f"Operação {getattr(func, '__name__', func)}", tentativa)
+
+# Cursor preparado reaproveitado por conexão física: o statement é preparado
+# no servidor uma única vez e depois só recebe novos parâmetros. O cursor do
+# conector compara a SQL por identidade, então use sempre a mesma constante.
+def prepared_cursor(conn, sql):
+    raw = _raw(conn)
+    statements = getattr(raw, '_vagas_statements', None)
+    if statements is None:
+        statements = raw._vagas_statements = {}
+    cursor = statements.get(sql)
+    if cursor is None:
+        cursor = statements[sql] = raw.cursor(prepared=True)
+    return cursor
@@ -0,0 +1,129 @@
+import os, re, asyncio, logging, tempfile
+from urllib.parse import urljoin
+import aiohttp
+from dotenv import load_dotenv
+import fetchpolicy, metrics
+
+# O pypdf é opcional: sem ele os editais ainda são encontrados (pdf_url),
+# só não são baixados nem lidos
+try:
+    import pypdf
+    logging.getLogger('pypdf').setLevel(logging.ERROR)
+except ImportError:
+    pypdf = None
+
+load_dotenv()
+
+# Leitura dos editais em PDF linkados na página do concurso (EDITAL_PDF=0
+# desliga). Cada PDF é baixado em streaming para um arquivo temporário e
+# abandonado se passar de EDITAL_MAX_MB; o texto é extraído página a página,
+# até EDITAL_MAX_PAGES páginas
+EDITAL_PDF = os.getenv('EDITAL_PDF', '1') != '0'
+PDF_ENABLED = EDITAL_PDF and pypdf is not None
+MAX_BYTES = int(float(os.getenv('EDITAL_MAX_MB', 15)) * 1024 * 1024)
+MAX_PAGES = max(1, int(os.getenv('EDITAL_MAX_PAGES', 150)))
+# PDFs lidos por concurso (edital de abertura primeiro, depois anexos)
+MAX_PDFS = max(1, int(os.getenv('EDITAL_MAX_PDFS', 2)))
+CHUNK_SIZE = 64 * 1024
+
+# Um PDF grande demora mais que uma página: o limite total é maior, os de
+# conexão e de leitura continuam os da política de requisições
+TIMEOUT = aiohttp.ClientTimeout(total=float(os.getenv('EDITAL_TIMEOUT', 120)),
+                                sock_connect=fetchpolicy.CONNECT_TIMEOUT,
+                                sock_read=fetchpolicy.READ_TIMEOUT)
+
+PDF_RE = re.compile(r'\.pdf(?:$|[?#])', re.I)
+EDITAL_RE = re.compile(r'edital', re.I)
+PDF_URL_MAX = 255
+
+class EditalGrande(Exception):
+    pass
+
+# Urls dos PDFs entre os links do #noticia, sem repetir, com os que falam em
+# edital (no link ou no texto) na frente
+def candidatos(links, base_url):
+    vistos = set()
+    editais, outros = [], []
+    for href, texto in links:
+        url = urljoin(base_url, href.strip())
+        if not PDF_RE.search(url) or url in vistos:
+            continue
+        vistos.add(url)
+        (editais if EDITAL_RE.search(url) or EDITAL_RE.search(texto) else outros).append(url)
+    return editais + outros
+
+# Url gravada na coluna pdf_url (VARCHAR(255)): a do primeiro candidato
+# que couber nela
+def pdf_url(pdfs):
+    return next((url for url in pdfs if len(url) <= PDF_URL_MAX), None)
+
+# Roda numa thread: o pypdf lê do arquivo só os objetos de cada página
+# conforme ela é visitada, e o texto de cada página é extraído e guardado
+# antes de passar para a seguinte
+def extrair_texto(path):
+    paginas = []
+    with open(path, 'rb') as f:
+        leitor = pypdf.PdfReader(f)
+        for i, pagina in enumerate(leitor.pages):
+            if i >= MAX_PAGES:
+                break
+            paginas.append(pagina.extract_text() or '')
+    return '\n'.join(paginas), len(paginas)
+
+# Baixa o corpo em blocos direto para o disco, sem nunca ter o PDF inteiro
+# na memória; recusa pelo Content-Length ou assim que o limite é passado
+async def _baixar(session, url, headers, diretorio):
+    async with session.get(url, headers=headers, timeout=TIMEOUT) as resp:
+        metrics.incr('http_responses_total', status=resp.status)
+        if resp.status == 304:
+            return None, resp.headers
+        resp.raise_for_status()
+        if resp.content_length and resp.content_length > MAX_BYTES:
+            raise EditalGrande(f"{resp.content_length / 1024 / 1024:.1f} MB")
+        fd, path = tempfile.mkstemp(suffix='.pdf', dir=diretorio)
+        try:
+            total = 0
+            with os.fdopen(fd, 'wb') as f:
+                async for bloco in resp.content.iter_chunked(CHUNK_SIZE):
+                    total += len(bloco)
+                    if total > MAX_BYTES:
+                        raise EditalGrande(f"mais de {MAX_BYTES / 1024 / 1024:.0f} MB")
+                    f.write(bloco)
+        except BaseException:
+            os.remove(path)
+            raise
+        metrics.incr('http_bytes_total', total)
+        return path, resp.headers
+
+# Texto do edital. O cache HTTP guarda o texto extraído (não o PDF) com os
+# validadores do PDF: um 304 devolve o texto sem baixar nem extrair de novo.
+# 'executar' é a política de requisições do scraper; 'extrair(path)' devolve
+# um awaitable com (texto, páginas, análise), para quem quer analisar o texto
+# no mesmo worker que o extraiu. Por padrão é extrair_texto numa thread, sem
+# análise. Retorna (texto, análise); a análise é None se o texto veio do cache
+async def ler_texto(session, url, cache, executar, diretorio, extrair=None):
+    headers = cache.validators(url) if cache else {}
+    # Um download grande é lento por natureza: não conta como sobrecarga
+    path, resp_headers = await executar(lambda: _baixar(session, url, headers, diretorio),
+                                        medir_latencia=False)
+    if path is None:
+        texto = cache.hit(url)
+        if texto is not None:
+            metrics.incr('pdf_total', resultado='cache')
+            return texto.decode('utf-8'), None
+        # Entrada sumiu do disco entre a validação e a leitura
+        return await ler_texto(session, url, None, executar, diretorio, extrair)
+    try:
+        with metrics.span('pdf_extract'):
+            if extrair is None:
+                texto, paginas = await asyncio.to_thread(extrair_texto, path)
+                analise = None
+            else:
+                texto, paginas, analise = await extrair(path)
+    finally:
+        os.remove(path)
+    metrics.incr('pdf_total', resultado='lido')
+    metrics.incr('pdf_pages_total', paginas)
+    if cache:
+        cache.store(url, texto.encode('utf-8'), resp_headers)
+    return texto, analise
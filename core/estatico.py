@@ -0,0 +1,204 @@
+import os, json, gzip, hashlib
+from datetime import datetime
+from dotenv import load_dotenv
+from normalizer import normalizar_texto
+import state, cleaner, metrics
+
+load_dotenv()
+
+# Exportação estática dos concursos abertos, para o nginx servir sem Python
+# nem MySQL no caminho da requisição (STATIC_EXPORT=0 desliga):
+#   estados/<uf>.json   concursos de cada estado
+#   cargos/<cargo>.json concursos de cada cargo (qualquer um de all_jobs)
+#   index.json          manifesto com arquivo, total e hash de cada shard
+# Cada arquivo tem uma versão .gz ao lado (gzip_static on). Só os shards cujo
+# conteúdo mudou são regravados; o manifesto vai por último. O manifesto
+# guarda também a start_date mais próxima de cada shard ('vence'), para que
+# a exportação incremental saiba quais perderam concursos por expiração
+EXPORT_ENABLED = os.getenv('STATIC_EXPORT', '1') != '0'
+EXPORT_DIR = os.getenv('STATIC_EXPORT_DIR', os.path.join(state.BASE_DIR, 'static'))
+MANIFEST = 'index.json'
+
+# Campos publicados de cada concurso (processed_at fica de fora: reprocessar
+# um concurso sem mudança nenhuma não deve regravar os shards dele)
+CAMPOS = ('title', 'url', 'state', 'job', 'all_jobs', 'start_date', 'end_date', 'pdf_url')
+
+def slug(nome):
+    return normalizar_texto(nome).replace(' ', '-') or '_'
+
+def _gravar(path, conteudo):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# Grava o .gz antes do .json: o nginx nunca vê um .json novo com o .gz antigo
+# ao lado. mtime=0 deixa o gzip igual para o mesmo conteúdo
+def _gravar_par(path, corpo):
+    _gravar(f"{path}.gz", gzip.compress(corpo, compresslevel=9, mtime=0))
+    _gravar(path, corpo)
+
+def _remover_par(path):
+    for caminho in (path, f"{path}.gz"):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+def _ler_manifesto(diretorio):
+    try:
+        with open(os.path.join(diretorio, MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Shards afetados por concursos gravados, substituídos ou removidos desde a
+# última exportação, como pares (tipo, nome). Até a primeira exportação do
+# processo não se sabe o que mudou antes dele: ela compara todos os shards
+_sujos = set()
+_completa = False
+
+def _chaves(entry):
+    chaves = [('estados', entry['state'])] if entry.get('state') else []
+    chaves.extend(('cargos', cargo) for cargo in dict.fromkeys(entry.get('all_jobs') or [entry['job']]))
+    return chaves
+
+# Marca os shards de cada concurso (a versão antiga e a nova, numa troca)
+def marcar(*entries):
+    for entry in entries:
+        if entry:
+            _sujos.update(_chaves(entry))
+
+# Entrega os shards marcados e recomeça a marcação; None enquanto a primeira
+# exportação completa não terminou
+def pendentes():
+    sujos = set(_sujos)
+    _sujos.clear()
+    return sujos if _completa else None
+
+# Agrupa os concursos abertos por estado e por cargo, do mais recente para o
+# mais antigo. Cada concurso é serializado uma vez só: o corpo de um shard é
+# a junção dos bytes dos seus concursos. Com 'alvo', só os concursos desses
+# shards são serializados. Devolve também a start_date mais próxima de cada
+# shard, o dia em que ele perde um concurso por expiração
+def agrupar(data_list, today=None, alvo=None):
+    today = today or datetime.today().date()
+    grupos = {'estados': {}, 'cargos': {}}
+    vencimentos = {}
+    for entry in reversed(data_list):
+        chaves = _chaves(entry)
+        if alvo is not None:
+            chaves = [chave for chave in chaves if chave in alvo]
+            if not chaves:
+                continue
+        if cleaner.classificar_entrada(entry, today) != cleaner.MANTER:
+            continue
+        corpo = json.dumps({campo: entry.get(campo) for campo in CAMPOS},
+                           ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        try:
+            inicio = cleaner.str_to_date(entry['start_date']).isoformat()
+        except (TypeError, ValueError):
+            inicio = None
+        for tipo, nome in chaves:
+            grupos[tipo].setdefault(nome, []).append(corpo)
+            if inicio and (vencimentos.get((tipo, nome)) or inicio) >= inicio:
+                vencimentos[(tipo, nome)] = inicio
+    return grupos, vencimentos
+
+def exportar(data_list, diretorio=None, today=None, sujos=None):
+    """Atualiza os shards; retorna (gravados, inalterados, removidos). Com
+    'sujos' (pendentes()), só esses shards e os que tiveram concursos
+    expirados são refeitos; sem ele, todos são comparados"""
+    global _completa
+    if not EXPORT_ENABLED:
+        return 0, 0, 0
+    diretorio = diretorio or EXPORT_DIR
+    try:
+        with metrics.span('static_export'):
+            resultado = _exportar(data_list, diretorio, today, sujos)
+    except OSError as e:
+        # O data.json já foi gravado; os shards ficam para a próxima vez,
+        # que compara todos eles de novo
+        print(f"[estatico] Falha na exportação para {diretorio}: {e}")
+        _completa = False
+        return 0, 0, 0
+    _completa = True
+    return resultado
+
+def _shard_existe(diretorio, info):
+    path = os.path.join(diretorio, info.get('arquivo', ''))
+    return os.path.exists(path) and os.path.exists(f"{path}.gz")
+
+def _exportar(data_list, diretorio, today, sujos):
+    today = today or datetime.today().date()
+    anterior = _ler_manifesto(diretorio)
+    manifesto = {}
+    gravados = removidos = 0
+
+    # Exportação incremental: os shards marcados, os que passaram do
+    # vencimento do seu concurso mais próximo e os que sumiram do disco
+    alvo = None
+    if sujos is not None and anterior:
+        hoje = today.isoformat()
+        alvo = set(sujos)
+        for tipo in ('estados', 'cargos'):
+            for nome, info in anterior.get(tipo, {}).items():
+                if (info.get('vence') or hoje) < hoje or not _shard_existe(diretorio, info):
+                    alvo.add((tipo, nome))
+        if not alvo:
+            inalterados = sum(len(anterior.get(tipo, {})) for tipo in ('estados', 'cargos'))
+            metrics.incr('static_shards_total', inalterados, resultado='inalterado')
+            return 0, inalterados, 0
+
+    todos, vencimentos = agrupar(data_list, today, alvo)
+    for tipo, grupos in todos.items():
+        os.makedirs(os.path.join(diretorio, tipo), exist_ok=True)
+        antigos = anterior.get(tipo, {})
+        if alvo is None:
+            shards, nomes = {}, set(grupos)
+        else:
+            # Os shards fora do alvo ficam como estão; os do alvo que não
+            # têm mais concursos abertos saem do manifesto
+            shards = {nome: info for nome, info in antigos.items() if (tipo, nome) not in alvo}
+            nomes = {nome for t, nome in alvo if t == tipo and nome in grupos}
+        for nome in nomes:
+            corpo = b'[' + b','.join(grupos[nome]) + b']'
+            info = {
+                'arquivo': f"{tipo}/{slug(nome)}.json",
+                'total': len(grupos[nome]),
+                'hash': hashlib.blake2b(corpo, digest_size=16).hexdigest(),
+            }
+            antigo = antigos.get(nome, {})
+            path = os.path.join(diretorio, info['arquivo'])
+            if (antigo.get('hash') == info['hash'] and antigo.get('arquivo') == info['arquivo']
+                    and _shard_existe(diretorio, info)):
+                info['atualizado_em'] = antigo.get('atualizado_em')
+            else:
+                _gravar_par(path, corpo)
+                info['atualizado_em'] = datetime.now().isoformat(timespec='seconds')
+                gravados += 1
+            info['vence'] = vencimentos.get((tipo, nome))
+            shards[nome] = info
+        manifesto[tipo] = {nome: shards[nome] for nome in sorted(shards)}
+
+        # Shards que ficaram sem concursos abertos (ou mudaram de arquivo)
+        atuais = {info['arquivo'] for info in shards.values()}
+        for nome, info in antigos.items():
+            if info.get('arquivo') and info['arquivo'] not in atuais:
+                _remover_par(os.path.join(diretorio, info['arquivo']))
+                removidos += 1
+
+    if gravados or removidos or manifesto != {tipo: anterior.get(tipo) for tipo in manifesto}:
+        manifesto['gerado_em'] = datetime.now().isoformat(timespec='seconds')
+        corpo = json.dumps(manifesto, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        _gravar_par(os.path.join(diretorio, MANIFEST), corpo)
+        for tipo in ('estados', 'cargos', ''):
+            state._fsync_dir(os.path.join(diretorio, tipo))
+
+    inalterados = sum(len(manifesto[tipo]) for tipo in ('estados', 'cargos')) - gravados
+    metrics.incr('static_shards_total', gravados, resultado='gravado')
+    metrics.incr('static_shards_total', inalterados, resultado='inalterado')
+    metrics.incr('static_shards_total', removidos, resultado='removido')
+    return gravados, inalterados, removidos
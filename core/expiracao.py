@@ -0,0 +1,86 @@
+import os, sqlite3
+from datetime import datetime
+
+def vencimento(entry):
+    """Dia (ordinal) a partir do qual o registro está vencido: 0 sem
+    start_date (sai na próxima limpeza), None com data inválida (o cleaner
+    mantém o registro)"""
+    start_date = entry.get('start_date')
+    if not start_date:
+        return 0
+    try:
+        return datetime.strptime(start_date, "%d/%m/%Y").date().toordinal()
+    except (TypeError, ValueError):
+        return None
+
+def _assinatura(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return ''
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+class IndiceExpiracao:
+    """Registros da base (url -> dia do vencimento) em um índice SQLite
+    ordenado pelo vencimento. Cada registro entra aqui quando é gravado no
+    journal; a limpeza só consulta o começo do índice (os que venceram), em
+    vez de reler e converter a data de toda a base.
+
+    O índice guarda a assinatura (mtime e tamanho) do snapshot que ele
+    descreve: se o data.json for trocado por fora, a assinatura não bate e o
+    índice é reconstruído na limpeza seguinte."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS expiracao ("
+            "url TEXT PRIMARY KEY, vence INTEGER) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_expiracao_vence ON expiracao (vence)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM expiracao").fetchone()[0]
+
+    def registrar(self, entry):
+        self.conn.execute("INSERT OR REPLACE INTO expiracao (url, vence) VALUES (?, ?)",
+                          (entry['url'], vencimento(entry)))
+        self.conn.commit()
+
+    # Urls vencidas antes de 'today' e o dia do vencimento de cada uma, 0 para
+    # as sem data (range scan no índice de vencimento)
+    def vencidos(self, today):
+        return dict(self.conn.execute(
+            "SELECT url, vence FROM expiracao WHERE vence < ?", (today.toordinal(),)))
+
+    def remover(self, urls):
+        self.conn.executemany("DELETE FROM expiracao WHERE url = ?", ((url,) for url in urls))
+        self.conn.commit()
+
+    def em_dia(self, snapshot_path):
+        row = self.conn.execute("SELECT valor FROM meta WHERE chave = 'snapshot'").fetchone()
+        return row is not None and row[0] == _assinatura(snapshot_path)
+
+    # Registra que o índice descreve o snapshot como ele está agora
+    def marcar(self, snapshot_path):
+        self.conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('snapshot', ?)",
+                          (_assinatura(snapshot_path),))
+        self.conn.commit()
+
+    # Refaz o índice a partir da base inteira (primeira execução ou snapshot
+    # alterado por fora)
+    def reconstruir(self, data_list, snapshot_path):
+        with self.conn:
+            self.conn.execute("DELETE FROM expiracao")
+            self.conn.executemany("INSERT OR REPLACE INTO expiracao (url, vence) VALUES (?, ?)",
+                                  ((entry['url'], vencimento(entry)) for entry in data_list))
+            self.conn.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('snapshot', ?)",
+                              (_assinatura(snapshot_path),))
+
+    def close(self):
+        self.conn.close()
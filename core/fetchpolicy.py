@@ -0,0 +1,183 @@
+import os, time, random, asyncio
+from collections import deque
+import aiohttp
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+# Política de requisições ao site: limite de taxa (token bucket), limite de
+# concorrência adaptativo (AIMD), timeouts separados de conexão e leitura,
+# novas tentativas com backoff e jitter, e um disjuntor para quando o site
+# cai de vez.
+RATE = float(os.getenv('FETCH_RATE', 5))              # requisições/s (0 desliga)
+BURST = max(1, int(os.getenv('FETCH_BURST', 10)))
+CONNECT_TIMEOUT = float(os.getenv('FETCH_CONNECT_TIMEOUT', 10))
+READ_TIMEOUT = float(os.getenv('FETCH_READ_TIMEOUT', 20))
+TOTAL_TIMEOUT = float(os.getenv('FETCH_TOTAL_TIMEOUT', 45))
+ATTEMPTS = max(1, int(os.getenv('FETCH_ATTEMPTS', 4)))
+BACKOFF_BASE = float(os.getenv('FETCH_BACKOFF_BASE', 1))
+BACKOFF_MAX = float(os.getenv('FETCH_BACKOFF_MAX', 30))
+# Respostas mais lentas que isso contam como sinal de sobrecarga no AIMD
+LATENCY_TARGET = float(os.getenv('FETCH_LATENCY_TARGET', 5))
+MIN_CONCURRENCY = max(1, int(os.getenv('FETCH_MIN_CONCURRENCY', 1)))
+BREAKER_THRESHOLD = max(1, int(os.getenv('FETCH_BREAKER_THRESHOLD', 10)))
+BREAKER_COOLDOWN = float(os.getenv('FETCH_BREAKER_COOLDOWN', 60))
+
+TIMEOUT = aiohttp.ClientTimeout(total=TOTAL_TIMEOUT, sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+
+# Status que indicam servidor sobrecarregado ou instável (vale repetir)
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+class CircuitoAberto(Exception):
+    pass
+
+def repetivel(erro):
+    if isinstance(erro, aiohttp.ClientResponseError):
+        return erro.status in STATUS_REPETIVEIS
+    return isinstance(erro, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+# Backoff exponencial com jitter completo: espalha as novas tentativas de
+# várias páginas que falharam juntas
+def backoff(tentativa):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (tentativa - 1)))
+
+def _retry_after(erro):
+    headers = getattr(erro, 'headers', None)
+    try:
+        return min(BACKOFF_MAX, float(headers.get('Retry-After')))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    def __init__(self, taxa=None, capacidade=BURST):
+        self.taxa = RATE if taxa is None else taxa
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.atualizado = time.monotonic()
+
+    # Tudo roda no mesmo event loop: não há await entre conferir e gastar
+    async def adquirir(self):
+        if self.taxa <= 0:
+            return
+        while True:
+            agora = time.monotonic()
+            self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+            self.atualizado = agora
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.taxa)
+
+# Limite de requisições simultâneas: sobe 1 a cada 'limite' respostas
+# rápidas e cai pela metade diante de 429/5xx/timeout ou lentidão (no
+# máximo um corte por janela de LATENCY_TARGET, para que várias falhas
+# simultâneas da mesma onda não derrubem o limite até o mínimo)
+class LimiteAIMD:
+    def __init__(self, maximo, minimo=MIN_CONCURRENCY, alvo=LATENCY_TARGET):
+        self.maximo = max(minimo, maximo)
+        self.minimo = minimo
+        self.alvo = alvo
+        self.limite = float(self.maximo)
+        self.em_uso = 0
+        self.ultimo_corte = 0.0
+        self._espera = deque()
+
+    async def entrar(self):
+        while self.em_uso >= int(self.limite):
+            futuro = asyncio.get_running_loop().create_future()
+            self._espera.append(futuro)
+            await futuro
+        self.em_uso += 1
+
+    def sair(self):
+        self.em_uso -= 1
+        self._acordar()
+
+    def _acordar(self):
+        livres = int(self.limite) - self.em_uso
+        while livres > 0 and self._espera:
+            futuro = self._espera.popleft()
+            if not futuro.done():
+                futuro.set_result(None)
+                livres -= 1
+
+    def sucesso(self, latencia):
+        if latencia > self.alvo:
+            self.sobrecarga()
+            return
+        self.limite = min(self.maximo, self.limite + 1 / self.limite)
+        self._acordar()
+
+    def sobrecarga(self):
+        agora = time.monotonic()
+        if agora - self.ultimo_corte < self.alvo:
+            return
+        self.ultimo_corte = agora
+        self.limite = max(self.minimo, self.limite / 2)
+        metrics.incr('fetch_concurrency_cuts_total')
+
+# Depois de BREAKER_THRESHOLD falhas seguidas, recusa requisições por
+# BREAKER_COOLDOWN segundos; passada a espera, uma falha já reabre
+class Disjuntor:
+    def __init__(self, limite=BREAKER_THRESHOLD, espera=BREAKER_COOLDOWN):
+        self.limite = limite
+        self.espera = espera
+        self.falhas = 0
+        self.aberto_ate = 0.0
+
+    def verificar(self):
+        if time.monotonic() < self.aberto_ate:
+            raise CircuitoAberto(f"site indisponível, novas requisições suspensas por até {self.espera:.0f}s")
+
+    def sucesso(self):
+        self.falhas = 0
+
+    def falha(self):
+        self.falhas += 1
+        if self.falhas >= self.limite:
+            self.aberto_ate = time.monotonic() + self.espera
+            self.falhas = self.limite - 1
+            metrics.incr('fetch_breaker_open_total')
+
+class FetchPolicy:
+    def __init__(self, max_concurrency, taxa=None, tentativas=ATTEMPTS):
+        self.balde = TokenBucket(taxa)
+        self.limite = LimiteAIMD(max_concurrency)
+        self.disjuntor = Disjuntor()
+        self.tentativas = tentativas
+
+    # Executa requisicao() (uma corrotina nova por tentativa) respeitando a
+    # taxa e o limite de concorrência; a espera entre tentativas acontece
+    # fora da vaga, para não segurar a concorrência de quem está saudável.
+    # medir_latencia=False para downloads grandes, lentos por natureza
+    async def executar(self, requisicao, medir_latencia=True):
+        for tentativa in range(1, self.tentativas + 1):
+            self.disjuntor.verificar()
+            await self.balde.adquirir()
+            await self.limite.entrar()
+            inicio = time.monotonic()
+            try:
+                resultado = await requisicao()
+            except Exception as erro:
+                if not repetivel(erro):
+                    # 404 e afins: o site respondeu normalmente
+                    self.disjuntor.sucesso()
+                    raise
+                self.limite.sobrecarga()
+                self.disjuntor.falha()
+                if tentativa == self.tentativas:
+                    raise
+                espera = _retry_after(erro) or backoff(tentativa)
+            else:
+                # Um download grande não diz nada sobre a carga do site:
+                # nem sobe nem derruba o limite
+                if medir_latencia:
+                    self.limite.sucesso(time.monotonic() - inicio)
+                self.disjuntor.sucesso()
+                metrics.definir('fetch_concurrency_limit', int(self.limite.limite))
+                return resultado
+            finally:
+                self.limite.sair()
+            metrics.incr('fetch_retries_total')
+            await asyncio.sleep(espera)
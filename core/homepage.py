@@ -0,0 +1,46 @@
+from collections import namedtuple
+
+# Resultado da comparação entre duas leituras da página inicial: listas de
+# listagens novas e alteradas, urls removidas e quantas ficaram iguais
+Diferenca = namedtuple('Diferenca', 'novos alterados removidos inalterados')
+
+# Campos da listagem que, se mudarem (prorrogação de prazo, título
+# corrigido), pedem uma nova leitura da página do concurso
+def assinatura(c):
+    return [c['title'], c['state'], c['date']]
+
+def snapshot(listagens):
+    return {c['url']: assinatura(c) for c in listagens}
+
+def comparar(anterior, listagens):
+    novos = []
+    alterados = []
+    inalterados = 0
+    vistos = set()
+    for c in listagens:
+        url = c['url']
+        if url in vistos:
+            continue
+        vistos.add(url)
+        antiga = anterior.get(url)
+        if antiga is None:
+            novos.append(c)
+        elif antiga != assinatura(c):
+            alterados.append(c)
+        else:
+            inalterados += 1
+    removidos = [url for url in anterior if url not in vistos]
+    return Diferenca(novos, alterados, removidos, inalterados)
+
+# Snapshot a gravar depois do crawl: as listagens cuja página não pôde ser
+# lida mantêm a assinatura anterior (ou ficam de fora, se eram novas), para
+# que a próxima verificação tente de novo
+def atualizar(anterior, listagens, falhas):
+    atual = {}
+    for c in listagens:
+        url = c['url']
+        if url not in falhas:
+            atual[url] = assinatura(c)
+        elif url in anterior:
+            atual[url] = anterior[url]
+    return atual
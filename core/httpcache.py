@@ -0,0 +1,112 @@
+import os, json, gzip, hashlib
+from collections import OrderedDict
+from state import BASE_DIR
+
+CACHE_DIR = os.path.join(BASE_DIR, 'http_cache')
+CACHE_MAX_BYTES = int(float(os.getenv('HTTP_CACHE_MAX_MB', 200)) * 1024 * 1024)
+
+def _escrever_atomico(path, dados):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dados)
+    os.replace(tmp_path, path)
+
+# Cache HTTP em disco, indexado pela URL. Cada entrada tem dois arquivos:
+# <chave>.gz com o corpo comprimido e <chave>.json com os validadores
+# (ETag/Last-Modified). A ordem LRU usa o mtime do corpo, atualizado a cada
+# hit, e as entradas mais antigas saem quando o tamanho total passa do limite.
+class HttpCache:
+    def __init__(self, diretorio=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.tamanhos = OrderedDict()
+        self.total = 0
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar_indice()
+
+    def _carregar_indice(self):
+        entradas = []
+        for entry in os.scandir(self.diretorio):
+            if entry.name.endswith('.gz'):
+                st = entry.stat()
+                entradas.append((st.st_mtime, entry.name[:-3], st.st_size))
+        for _, chave, tamanho in sorted(entradas):
+            self.tamanhos[chave] = tamanho
+            self.total += tamanho
+
+    @staticmethod
+    def chave(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _caminhos(self, chave):
+        base = os.path.join(self.diretorio, chave)
+        return f"{base}.gz", f"{base}.json"
+
+    def _meta(self, chave):
+        if chave not in self.tamanhos:
+            return None
+        try:
+            with open(self._caminhos(chave)[1], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._remover(chave)
+            return None
+
+    # Cabeçalhos para uma requisição condicional (vazio se não houver cache)
+    def validators(self, url):
+        meta = self._meta(self.chave(url))
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    # Corpo em cache após um 304; marca a entrada como usada recentemente
+    def hit(self, url):
+        chave = self.chave(url)
+        corpo_path = self._caminhos(chave)[0]
+        try:
+            with open(corpo_path, 'rb') as f:
+                body = gzip.decompress(f.read())
+        except (OSError, EOFError, gzip.BadGzipFile):
+            self._remover(chave)
+            return None
+        os.utime(corpo_path)
+        self.tamanhos.move_to_end(chave)
+        return body
+
+    # Só vale guardar respostas que permitem revalidação
+    def store(self, url, body, headers):
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        chave = self.chave(url)
+        if not etag and not last_modified:
+            if chave in self.tamanhos:
+                self._remover(chave)
+            return
+
+        corpo_path, meta_path = self._caminhos(chave)
+        comprimido = gzip.compress(body, compresslevel=6)
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified}
+        _escrever_atomico(corpo_path, comprimido)
+        _escrever_atomico(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+        self.total -= self.tamanhos.pop(chave, 0)
+        self.tamanhos[chave] = len(comprimido)
+        self.total += len(comprimido)
+        self._evict()
+
+    def _remover(self, chave):
+        for path in self._caminhos(chave):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.total -= self.tamanhos.pop(chave, 0)
+
+    def _evict(self):
+        while self.total > self.max_bytes and len(self.tamanhos) > 1:
+            chave = next(iter(self.tamanhos))
+            self._remover(chave)
@@ -0,0 +1,63 @@
+from collections import namedtuple
+
+# Ocorrência de um padrão no texto normalizado (posições em caracteres)
+Match = namedtuple('Match', ['rotulo', 'inicio', 'fim'])
+
+# Chave reservada no nó da trie que guarda os rótulos dos padrões que
+# terminam ali (tokens nunca são vazios, então não há colisão)
+_FIM = ''
+
+# Trie compilada por palavra: cada padrão vira um caminho de tokens, então o
+# texto é percorrido uma única vez e só avança na trie enquanto as palavras
+# seguintes continuarem um padrão. O custo depende do tamanho do texto e da
+# profundidade dos padrões, não da quantidade de padrões, e os limites de
+# palavra são respeitados naturalmente.
+class CargoMatcher:
+    def __init__(self, padroes):
+        self.raiz = {}
+        self.total = 0
+        for rotulo, texto in padroes:
+            tokens = texto.split()
+            if not tokens:
+                continue
+            no = self.raiz
+            for token in tokens:
+                no = no.setdefault(token, {})
+            no.setdefault(_FIM, []).append(rotulo)
+            self.total += 1
+
+    # Espera texto já normalizado (palavras separadas por um único espaço)
+    def encontrar(self, texto):
+        if not texto:
+            return []
+
+        raiz = self.raiz
+        tokens = texto.split(' ')
+        n = len(tokens)
+        matches = []
+        inicio = 0
+
+        for i, token in enumerate(tokens):
+            no = raiz.get(token)
+            if no is not None:
+                fim = inicio + len(token)
+                j = i
+                while True:
+                    rotulos = no.get(_FIM)
+                    if rotulos:
+                        for rotulo in rotulos:
+                            matches.append(Match(rotulo, inicio, fim))
+                    j += 1
+                    if j == n:
+                        break
+                    no = no.get(tokens[j])
+                    if no is None:
+                        break
+                    fim += 1 + len(tokens[j])
+            inicio += len(token) + 1
+
+        return matches
+
+# Monta o matcher a partir da lista de cargos, normalizando cada um
+def compilar_cargos(cargos, normalizar):
+    return CargoMatcher((cargo, normalizar(cargo)) for cargo in cargos)
@@ -0,0 +1,214 @@
+import os, time, threading
+from bisect import bisect_left
+from contextlib import nullcontext, contextmanager
+from datetime import datetime
+from state import BASE_DIR, atomic_write_json
+
+# Métricas de execução (METRICS=1 liga). Desligadas, cada chamada é só um
+# teste de booleano e span() devolve sempre o mesmo contexto nulo.
+ENABLED = os.getenv('METRICS', '0') == '1'
+METRICS_DIR = os.getenv('METRICS_DIR') or os.path.join(BASE_DIR, 'metrics')
+PREFIXO = 'vagas_'
+
+# Limites (em segundos) dos buckets dos histogramas de duração
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# insert_data roda na thread do banco, o resto no event loop
+_lock = threading.Lock()
+_contadores = {}
+_gauges = {}
+_histogramas = {}
+_execucao = 'vagas'
+_inicio = time.time()
+# Lista da coleta em andamento na thread (coletar), se houver
+_coleta = threading.local()
+
+class Histograma:
+    __slots__ = ('buckets', 'soma', 'total', 'minimo', 'maximo')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        self.buckets[bisect_left(BUCKETS, valor)] += 1
+        self.soma += valor
+        self.total += 1
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    # Quantil estimado pelos buckets, com interpolação linear dentro do
+    # bucket e limitado ao mínimo e ao máximo observados
+    def quantil(self, q):
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for i, quantidade in enumerate(self.buckets):
+            if quantidade and acumulado + quantidade >= alvo:
+                inferior = max(BUCKETS[i - 1] if i > 0 else 0.0, self.minimo)
+                superior = min(BUCKETS[i] if i < len(BUCKETS) else self.maximo, self.maximo)
+                return inferior + (superior - inferior) * (alvo - acumulado) / quantidade
+            acumulado += quantidade
+        return self.maximo
+
+def _chave(nome, labels):
+    return (nome, tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ())
+
+# Nome da execução (pipeline, daemon, scraper...): vira o nome dos arquivos
+# exportados e o label 'execucao' de todas as séries
+def iniciar(execucao):
+    global _execucao, _inicio
+    _execucao = execucao
+    _inicio = time.time()
+
+def incr(nome, valor=1, **labels):
+    if not ENABLED:
+        return
+    coletadas = getattr(_coleta, 'lista', None)
+    if coletadas is not None:
+        coletadas.append(('incr', nome, valor, labels))
+        return
+    chave = _chave(nome, labels)
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+def definir(nome, valor, **labels):
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[_chave(nome, labels)] = valor
+
+def observar(nome, valor, **labels):
+    if not ENABLED:
+        return
+    coletadas = getattr(_coleta, 'lista', None)
+    if coletadas is not None:
+        coletadas.append(('observar', nome, valor, labels))
+        return
+    chave = _chave(nome, labels)
+    with _lock:
+        histograma = _histogramas.get(chave)
+        if histograma is None:
+            histograma = _histogramas[chave] = Histograma()
+        histograma.observar(valor)
+
+# Métricas de um worker do executor de CPU: num processo à parte elas iriam
+# para um registro que ninguém exporta. Dentro de coletar() os contadores e
+# observações da thread vão para uma lista, que volta com o resultado e é
+# aplicada no processo principal por reaplicar()
+@contextmanager
+def coletar():
+    _coleta.lista = []
+    try:
+        yield _coleta.lista
+    finally:
+        _coleta.lista = None
+
+def reaplicar(coletadas):
+    for tipo, nome, valor, labels in coletadas:
+        (incr if tipo == 'incr' else observar)(nome, valor, **labels)
+
+# Trecho cronometrado: a duração vai para o histograma <nome>_seconds e uma
+# exceção conta em <nome>_errors_total. Vale também em código assíncrono
+class _Span:
+    __slots__ = ('nome', 'labels', 'inicio')
+
+    def __init__(self, nome, labels):
+        self.nome = nome
+        self.labels = labels
+        self.inicio = None
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        observar(f"{self.nome}_seconds", time.perf_counter() - self.inicio, **self.labels)
+        if tipo is not None:
+            incr(f"{self.nome}_errors_total", **self.labels)
+        return False
+
+_NULO = nullcontext()
+
+def span(nome, **labels):
+    if not ENABLED:
+        return _NULO
+    return _Span(nome, labels)
+
+def _formatar_labels(labels):
+    itens = [('execucao', _execucao)] + list(labels)
+    return '{' + ','.join(f'{k}="{v}"' for k, v in itens) + '}'
+
+def _formatar_labels_le(labels, le):
+    return _formatar_labels(list(labels) + [('le', le)])
+
+def _nome_serie(nome, labels):
+    if not labels:
+        return nome
+    return nome + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+
+def prometheus():
+    linhas = []
+    declarados = set()
+
+    def declarar(nome, tipo):
+        if nome not in declarados:
+            declarados.add(nome)
+            linhas.append(f"# TYPE {PREFIXO}{nome} {tipo}")
+
+    with _lock:
+        for (nome, labels), valor in sorted(_contadores.items()):
+            declarar(nome, 'counter')
+            linhas.append(f"{PREFIXO}{nome}{_formatar_labels(labels)} {valor}")
+        for (nome, labels), valor in sorted(_gauges.items()):
+            declarar(nome, 'gauge')
+            linhas.append(f"{PREFIXO}{nome}{_formatar_labels(labels)} {valor}")
+        for (nome, labels), h in sorted(_histogramas.items()):
+            declarar(nome, 'histogram')
+            acumulado = 0
+            for limite, quantidade in zip(BUCKETS + ('+Inf',), h.buckets):
+                acumulado += quantidade
+                linhas.append(f"{PREFIXO}{nome}_bucket{_formatar_labels_le(labels, limite)} {acumulado}")
+            linhas.append(f"{PREFIXO}{nome}_sum{_formatar_labels(labels)} {h.soma}")
+            linhas.append(f"{PREFIXO}{nome}_count{_formatar_labels(labels)} {h.total}")
+    return '\n'.join(linhas) + '\n'
+
+def resumo():
+    with _lock:
+        return {
+            'execucao': _execucao,
+            'inicio': datetime.fromtimestamp(_inicio).isoformat(),
+            'fim': datetime.now().isoformat(),
+            'duracao_segundos': time.time() - _inicio,
+            'contadores': {_nome_serie(n, l): v for (n, l), v in sorted(_contadores.items())},
+            'gauges': {_nome_serie(n, l): v for (n, l), v in sorted(_gauges.items())},
+            'histogramas': {
+                _nome_serie(n, l): {
+                    'count': h.total,
+                    'sum': h.soma,
+                    'min': h.minimo,
+                    'max': h.maximo,
+                    'p50': h.quantil(0.5),
+                    'p99': h.quantil(0.99),
+                }
+                for (n, l), h in sorted(_histogramas.items())
+            },
+        }
+
+# Grava <METRICS_DIR>/vagas_<execucao>.prom (para o textfile collector do
+# node_exporter) e <execucao>.json com o resumo da execução. Os dois são
+# trocados atomicamente, então o coletor nunca lê um arquivo pela metade
+def exportar():
+    if not ENABLED:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    prom_path = os.path.join(METRICS_DIR, f"{PREFIXO}{_execucao}.prom")
+    tmp_path = f"{prom_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus())
+    os.replace(tmp_path, prom_path)
+    atomic_write_json(resumo(), os.path.join(METRICS_DIR, f"{_execucao}.json"))
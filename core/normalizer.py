@@ -0,0 +1,70 @@
+import re, unicodedata
+
+# Implementação original, mantida como referência e como fallback para
+# caracteres que não podem ser normalizados isoladamente
+def normalizar_texto_referencia(texto):
+    if not texto:
+        return ""
+
+    texto = unicodedata.normalize('NFD', texto)
+    texto = ''.join(char for char in texto if unicodedata.category(char) != 'Mn')
+
+    texto = texto.lower()
+
+    texto = re.sub(r'[^\w\s]', ' ', texto, flags=re.UNICODE)
+    texto = re.sub(r'\s+', ' ', texto)
+
+    return texto.strip()
+
+class _ForaDaTabela(Exception):
+    pass
+
+# Caracteres cujo resultado depende dos vizinhos: o sigma maiúsculo (lower()
+# decide entre σ e ς pelo contexto) e marcas combinantes que não são 'Mn' e
+# podem ser reordenadas pela NFD junto com as do caractere seguinte
+def _depende_de_contexto(char):
+    if char == 'Σ':
+        return True
+    for c in unicodedata.normalize('NFD', char):
+        if unicodedata.combining(c) and unicodedata.category(c) != 'Mn':
+            return True
+    return False
+
+def _normalizar_caractere(char):
+    decomposto = unicodedata.normalize('NFD', char)
+    texto = ''.join(c for c in decomposto if unicodedata.category(c) != 'Mn').lower()
+    return re.sub(r'[^\w\s]', ' ', texto)
+
+# Tabela para str.translate: cada caractere é normalizado uma única vez e o
+# resultado fica em cache. Espaços continuam espaços e são colapsados depois.
+class _TabelaNormalizacao(dict):
+    def __missing__(self, codigo):
+        char = chr(codigo)
+        if _depende_de_contexto(char):
+            raise _ForaDaTabela(char)
+        valor = _normalizar_caractere(char)
+        self[codigo] = valor
+        return valor
+
+_TABELA = _TabelaNormalizacao()
+
+# Pré-carrega Latin-1, Latin Extended-A/B e a pontuação geral (travessões,
+# aspas tipográficas), que cobrem praticamente todo o texto dos editais
+for _codigo in list(range(0x250)) + list(range(0x2000, 0x2070)):
+    try:
+        _TABELA[_codigo]
+    except _ForaDaTabela:
+        pass
+
+# Função para normalizar texto: mesmo resultado de normalizar_texto_referencia,
+# mas com uma única passada de str.translate e um split/join para os espaços
+def normalizar_texto(texto):
+    if not texto:
+        return ""
+
+    try:
+        texto = texto.translate(_TABELA)
+    except _ForaDaTabela:
+        return normalizar_texto_referencia(texto)
+
+    return ' '.join(texto.split())
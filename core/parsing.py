@@ -0,0 +1,93 @@
+import os, re
+from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
+from bs4.dammit import EncodingDetector
+import metrics
+
+# Backend do BeautifulSoup: usa lxml (bem mais rápido) quando estiver
+# instalado, senão o html.parser da biblioteca padrão
+def _parser_padrao():
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+HTML_PARSER = os.getenv('SCRAPER_HTML_PARSER') or _parser_padrao()
+
+# Só os nós que interessam entram na árvore; o resto da página é descartado
+# durante o parsing, sem construir objetos para menus, scripts e propaganda
+NOTICIA_STRAINER = SoupStrainer(id='noticia')
+LISTAGEM_STRAINER = SoupStrainer('div', attrs={'data-url': True})
+
+# Localiza a tag de abertura do #noticia direto nos bytes da página
+NOTICIA_RE = re.compile(rb'''<[a-zA-Z][^<>]*(?<![-\w])id\s*=\s*["']?noticia["'\s>]''')
+
+def make_soup(html, parse_only=None, from_encoding=None):
+    global HTML_PARSER
+    with metrics.span('parse_html'):
+        try:
+            return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only, from_encoding=from_encoding)
+        except FeatureNotFound:
+            print(f"[parsing] Parser '{HTML_PARSER}' indisponível, usando html.parser")
+            HTML_PARSER = 'html.parser'
+            return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only, from_encoding=from_encoding)
+
+# Extrai as listagens (div[data-url]) da página inicial
+def parse_listagens(html, base_url):
+    return listagens_da_soup(make_soup(html, LISTAGEM_STRAINER), base_url)
+
+# Percorre os descendentes de cada listagem uma única vez em vez de fazer
+# uma busca separada para o link, o estado e a data
+def listagens_da_soup(soup, base_url):
+    contests = []
+    for div in soup.find_all('div', attrs={'data-url': True}):
+        rel = div['data-url']
+        url = rel if rel.startswith('http') else base_url + rel
+        a = cc = ce = None
+        for tag in div.find_all(('a', 'div')):
+            if tag.name == 'a':
+                if a is None:
+                    a = tag
+                continue
+            classes = tag.get('class') or ()
+            if cc is None and 'cc' in classes:
+                cc = tag
+            elif ce is None and 'ce' in classes:
+                ce = tag
+        title = a.get('title', '').strip() if a else 'Sem título'
+        state = (cc.get_text(strip=True) if cc else '') or 'NACIONAL'
+        date = 'Em breve'
+        span = ce.find('span') if ce else None
+        if span:
+            raw = ''.join(span.strings)
+            date = raw.replace('Até', '').strip()
+        contests.append({'title': title, 'url': url, 'state': state, 'date': date})
+    return contests
+
+# Retorna (texto, achou_noticia, links), onde links são os pares (href,
+# texto) das âncoras do #noticia (onde ficam os editais em PDF). O parsing
+# começa na tag do #noticia, pulando cabeçalho e menus, e só monta a árvore
+# dele. Se o #noticia não existir, faz o parsing da página inteira como
+# antes, sem links: os da página inteira seriam de outros concursos
+def extrair_concurso(html):
+    if isinstance(html, bytes):
+        m = NOTICIA_RE.search(html)
+        if m:
+            # O <meta charset> fica no <head>, que é cortado: detecta antes
+            encoding = EncodingDetector.find_declared_encoding(html[:m.start()], is_html=True)
+            noticia = make_soup(html[m.start():], NOTICIA_STRAINER, encoding).find(id='noticia')
+            if noticia:
+                return noticia.get_text(separator=' '), True, _links(noticia)
+    else:
+        noticia = make_soup(html, NOTICIA_STRAINER).find(id='noticia')
+        if noticia:
+            return noticia.get_text(separator=' '), True, _links(noticia)
+    return make_soup(html).get_text(separator=' '), False, []
+
+def _links(noticia):
+    return [(a['href'], a.get_text(' ', strip=True)) for a in noticia.find_all('a', href=True)]
+
+# Retorna (texto, achou_noticia)
+def extrair_texto_concurso(html):
+    texto, achou_noticia, _ = extrair_concurso(html)
+    return texto, achou_noticia
@@ -0,0 +1,200 @@
+import os, time, asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import mysql.connector
+import scraper, cleaner, database, dbpool, schema, metrics
+from database import logger
+
+# Tamanho do lote enviado ao banco e tempo máximo que um lote incompleto
+# espera antes de ser gravado mesmo assim
+BATCH_SIZE = max(1, int(os.getenv('PIPELINE_BATCH_SIZE', 50)))
+FLUSH_SECONDS = float(os.getenv('PIPELINE_FLUSH_SECONDS', 5))
+
+# Marca o fim do fluxo entre as etapas
+_FIM = object()
+
+# Primeira etapa: o crawl, ou a 'origem' informada a run_pipeline. Se ela
+# falhar, run_pipeline cancela as outras etapas: não há _FIM a enviar
+async def etapa_origem(saida, origem):
+    await origem(saida)
+    await saida.put(_FIM)
+
+def etapa_scraper(session=None, retomar=False):
+    return lambda saida: scraper.check_and_process(fila=saida, session=session, retomar=retomar)
+
+# Aplica a mesma regra do cleaner a cada entrada assim que ela é coletada
+async def etapa_limpeza(entrada, saida, contagem):
+    today = datetime.today().date()
+    while True:
+        entry = await entrada.get()
+        if entry is _FIM:
+            await saida.put(_FIM)
+            return
+        resultado = cleaner.classificar_entrada(entry, today)
+        contagem[resultado] = contagem.get(resultado, 0) + 1
+        if resultado == cleaner.MANTER:
+            await saida.put(entry)
+
+# Agrupa as entradas em lotes e grava cada lote em uma thread dedicada, para
+# que o driver MySQL (bloqueante) não pare o event loop do crawl. Cada lote
+# pega uma conexão do pool, que é verificada e reconectada se tiver caído.
+# Se o banco cair de vez (o pool já esgotou as novas tentativas), o erro vai
+# para 'falhas' e as entradas seguintes só são consumidas: o crawl continua
+# e elas ficam no journal, de onde a próxima execução as envia
+async def etapa_banco(entrada, executor, enviados, totais, fingerprints, falhas):
+    loop = asyncio.get_running_loop()
+    lote = []
+
+    async def gravar():
+        try:
+            inseridos, atualizados = await loop.run_in_executor(
+                executor, dbpool.run, database.insert_data, list(lote), None, fingerprints)
+        except mysql.connector.Error as err:
+            logger.error(f"Erro no banco de dados: {err}. As próximas entradas ficam só no journal")
+            falhas.append(err)
+        else:
+            totais['inseridos'] += inseridos
+            totais['atualizados'] += atualizados
+            enviados.update(entry['url'] for entry in lote)
+        lote.clear()
+
+    while True:
+        if falhas:
+            if await entrada.get() is _FIM:
+                return
+            continue
+        try:
+            entry = await asyncio.wait_for(entrada.get(), timeout=FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            if lote:
+                await gravar()
+            continue
+        if entry is _FIM:
+            if lote:
+                await gravar()
+            return
+        lote.append(entry)
+        if len(lote) >= BATCH_SIZE:
+            await gravar()
+
+# Aplica as migrações e carrega as fingerprints, compartilhadas por todos os
+# lotes (e, no daemon, por todas as rodadas)
+async def preparar_banco(executor):
+    loop = asyncio.get_running_loop()
+    logger.info("Conectando ao banco de dados...")
+    await loop.run_in_executor(executor, dbpool.run, schema.migrate)
+    return await loop.run_in_executor(executor, dbpool.run, database.load_fingerprints)
+
+# Limpeza da base direto da memória, sem reler o data.json (só os registros
+# vencidos desde a última limpeza são examinados), seguida da sincronização
+# dos registros já existentes, como a etapa database faria. Com o banco fora
+# do ar ('banco_ok' falso) só a limpeza local roda
+async def reconciliar_base(executor, enviados, fingerprints, banco_ok=True):
+    loop = asyncio.get_running_loop()
+    # Em uso contínuo (daemon) a lista em memória também precisa ser limpa
+    data_list = scraper.data_list
+    _, original_count, removed_empty, removed_expired = cleaner.limpar_base(data_list)
+    cleaner.print_summary(original_count, len(data_list), removed_empty, removed_expired)
+    if not banco_ok:
+        return
+
+    # A expiração vai na mesma transação do último lote
+    restantes = [entry for entry in data_list if entry['url'] not in enviados]
+    await loop.run_in_executor(executor, partial(
+        dbpool.run, database.insert_data, restantes, fingerprints=fingerprints, expire=True))
+    await loop.run_in_executor(executor, dbpool.run, database.get_status_summary)
+
+# Roda as etapas juntas. Se uma falhar, as outras são canceladas e esperadas
+# antes de o erro subir: no daemon, um crawl órfão continuaria com a sessão
+# compartilhada, parado para sempre numa fila que ninguém mais consome
+async def executar_etapas(*etapas):
+    tarefas = [asyncio.ensure_future(etapa) for etapa in etapas]
+    try:
+        await asyncio.gather(*tarefas)
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+
+# Execução avulsa: sem argumentos, abre tudo do zero. O daemon passa a sessão
+# HTTP, o executor do banco e as fingerprints que mantém entre as rodadas
+# (o estado do scraper já está em memória), e usa reconciliar=False nas
+# verificações rápidas, que só gravam o que o crawl encontrou de novo.
+# 'origem' troca o crawl por outra função que recebe a fila de saída e a
+# alimenta com entradas, como o reprocessamento do reprocess.py. Com
+# retomar=True o crawl continua do checkpoint de uma execução interrompida.
+async def run_pipeline(session=None, executor=None, fingerprints=None, reconciliar=True, origem=None,
+                       retomar=False):
+    logger.info("=== PIPELINE EM PROCESSO ===")
+    inicio = time.perf_counter()
+    sucesso = False
+    proprio_executor = executor is None
+    if proprio_executor:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db')
+    try:
+        # Um banco fora do ar não impede o crawl nem a limpeza local, como
+        # no modo --subprocess: só a etapa database deixa de gravar
+        falhas = []
+        if fingerprints is None:
+            scraper.init_state()
+            try:
+                fingerprints = await preparar_banco(executor)
+            except mysql.connector.Error as err:
+                logger.error(f"Erro no banco de dados: {err}. O crawl continua sem gravar no banco")
+                falhas.append(err)
+
+        coletados = asyncio.Queue(maxsize=BATCH_SIZE * 4)
+        limpos = asyncio.Queue(maxsize=BATCH_SIZE * 4)
+        contagem = {}
+        enviados = set()
+        totais = {'inseridos': 0, 'atualizados': 0}
+
+        await executar_etapas(
+            etapa_origem(coletados, origem or etapa_scraper(session, retomar)),
+            etapa_limpeza(coletados, limpos, contagem),
+            etapa_banco(limpos, executor, enviados, totais, fingerprints, falhas),
+        )
+        descartadas = contagem.get(cleaner.SEM_DATA, 0) + contagem.get(cleaner.EXPIRADO, 0)
+        logger.info(f"Entradas novas gravadas durante o crawl - Inseridos: {totais['inseridos']}, Atualizados: {totais['atualizados']}, Descartadas na limpeza: {descartadas}")
+
+        # Concursos buscados de novo que deixaram de valer saem do banco
+        if not falhas:
+            await asyncio.get_running_loop().run_in_executor(
+                executor, dbpool.run, database.aplicar_remocoes, list(scraper.data_list), fingerprints)
+
+        if reconciliar:
+            await reconciliar_base(executor, enviados, fingerprints, banco_ok=not falhas)
+        if falhas:
+            return False
+        logger.info("Processamento concluído com sucesso!")
+        sucesso = True
+        return True
+    except mysql.connector.Error as err:
+        logger.error(f"Erro no banco de dados: {err}")
+        return False
+    finally:
+        if proprio_executor:
+            executor.shutdown(wait=True)
+        registrar_execucao(reconciliar, time.perf_counter() - inicio, sucesso)
+
+# Duração e resultado de cada execução, para alertas de execuções lentas ou
+# com falha; os arquivos de métricas são regravados ao fim de cada uma
+def registrar_execucao(reconciliar, duracao, sucesso):
+    modo = 'completo' if reconciliar else 'rapido'
+    metrics.observar('pipeline_run_seconds', duracao, modo=modo)
+    metrics.definir('pipeline_last_run_seconds', duracao, modo=modo)
+    metrics.definir('pipeline_last_run_success', int(sucesso), modo=modo)
+    metrics.definir('pipeline_last_run_timestamp_seconds', time.time(), modo=modo)
+    metrics.incr('pipeline_runs_total', modo=modo, resultado='sucesso' if sucesso else 'falha')
+    metrics.exportar()
+
+def main(retomar=False):
+    metrics.iniciar('pipeline')
+    try:
+        return asyncio.run(run_pipeline(retomar=retomar))
+    finally:
+        scraper.encerrar_cpu_executor()
+
+if __name__ == '__main__':
+    main()
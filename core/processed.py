@@ -0,0 +1,80 @@
+import os, time, sqlite3, hashlib
+from datetime import datetime, date, time as dt_time
+
+# Tempo que uma url fica registrada depois do prazo do concurso (ou da data
+# em que foi vista, se não houver prazo) antes de ser descartada
+TTL_DAYS = max(1, int(os.getenv('PROCESSED_TTL_DAYS', 180)))
+
+# Cada url vira uma chave de 8 bytes (blake2b); com alguns milhões de urls
+# a chance de colisão continua desprezível, e o índice fica bem menor que
+# guardar as urls inteiras
+def chave(url):
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+def _timestamp(prazo):
+    if isinstance(prazo, datetime):
+        return prazo.timestamp()
+    if isinstance(prazo, date):
+        return datetime.combine(prazo, dt_time.max).timestamp()
+    return prazo
+
+class ProcessedStore:
+    """Conjunto das urls já processadas, em um índice SQLite no disco: cada
+    consulta é uma busca pela chave primária, sem carregar o histórico
+    inteiro na memória. Cada url expira TTL_DAYS depois do prazo do concurso."""
+
+    def __init__(self, path, ttl_days=TTL_DAYS):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        # WAL + synchronous=NORMAL: cada commit é só um append no log, sem
+        # fsync; um crash perde no máximo as últimas urls, que são refeitas
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "key INTEGER PRIMARY KEY, expires_at INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_expires ON processed (expires_at)")
+        self.conn.commit()
+
+    def __contains__(self, url):
+        row = self.conn.execute("SELECT 1 FROM processed WHERE key = ?", (chave(url),)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def expiracao(self, prazo=None):
+        agora = time.time()
+        inicio = max(_timestamp(prazo), agora) if prazo is not None else agora
+        return int(inicio + self.ttl)
+
+    # Registra a url; se já existir, mantém a expiração mais distante
+    def add(self, url, prazo=None):
+        self.conn.execute(
+            "INSERT INTO processed (key, expires_at) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET expires_at = MAX(expires_at, excluded.expires_at)",
+            (chave(url), self.expiracao(prazo))
+        )
+        self.conn.commit()
+
+    def update(self, urls, prazo=None):
+        expires_at = self.expiracao(prazo)
+        self.conn.executemany(
+            "INSERT INTO processed (key, expires_at) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET expires_at = MAX(expires_at, excluded.expires_at)",
+            ((chave(url), expires_at) for url in urls)
+        )
+        self.conn.commit()
+
+    # Remove as urls vencidas (range scan no índice de expiração)
+    def evict(self, agora=None):
+        agora = int(agora if agora is not None else time.time())
+        cursor = self.conn.execute("DELETE FROM processed WHERE expires_at < ?", (agora,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
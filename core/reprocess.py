@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Reaplica a busca de cargos sobre as páginas arquivadas, sem baixar nada.
+
+Uso (no diretório core): python reprocess.py [--workers N]
+
+Útil depois de acrescentar cargos em base.CARGOS: concursos rejeitados antes
+("sem cargos de TI") que agora casam entram no pipeline normal (limpeza e
+banco), assim como os já aceitos cuja lista de cargos mudou.
+"""
+import os, argparse, asyncio
+from functools import partial
+from datetime import datetime
+import scraper, state, pipeline, metrics
+from archive import PageArchive, ARCHIVE_DIR, ler_objeto
+from parsing import extrair_concurso
+import edital
+
+# Páginas enviadas por vez a cada worker (menos idas e voltas entre processos)
+CHUNK_SIZE = max(1, int(os.getenv('REPROCESS_CHUNK_SIZE', 16)))
+
+# Retorna (cargos, pdf_url, erro). Os editais não são baixados: entram só
+# os que já têm o texto no cache HTTP
+def analisar(path, url):
+    try:
+        texto, _, links = extrair_concurso(ler_objeto(path))
+    except (OSError, EOFError) as e:
+        return None, None, str(e)
+    cargos = set(scraper.buscar_cargos(texto))
+    pdfs = edital.candidatos(links, url)
+    if pdfs and scraper.HTTP_CACHE_ENABLED:
+        cache = scraper.get_http_cache()
+        for pdf in pdfs[:edital.MAX_PDFS]:
+            texto_pdf = cache.hit(pdf)
+            if texto_pdf is not None:
+                cargos.update(scraper.buscar_cargos(texto_pdf.decode('utf-8')))
+    return scraper.ordenar_cargos(cargos), edital.pdf_url(pdfs), None
+
+# Analisa as páginas no executor de CPU do scraper (scraper.get_cpu_executor),
+# em lotes de CHUNK_SIZE; sem executor, tudo nesta thread. As métricas de
+# cada worker voltam com os resultados
+def _analisar_tudo(caminhos, urls):
+    executor = scraper.get_cpu_executor()
+    if executor is None:
+        return list(map(analisar, caminhos, urls))
+    tarefa = partial(scraper.executar_no_worker, metrics.ENABLED, analisar)
+    resultados = []
+    for resultado, coletadas in executor.map(tarefa, caminhos, urls, chunksize=CHUNK_SIZE):
+        metrics.reaplicar(coletadas)
+        resultados.append(resultado)
+    return resultados
+
+# Primeira etapa do pipeline no lugar do crawl: só emite os concursos que
+# passaram a casar (ou cujos cargos mudaram) e ainda não expiraram
+async def etapa_reprocessamento(saida, diretorio=ARCHIVE_DIR, workers=None):
+    try:
+        arquivo = PageArchive(diretorio)
+        registros = list(arquivo.entradas().values())
+        # Url de uma das listagens de cada página, base dos links relativos
+        urls = {r['sha256']: r['url'] for r in registros}
+        chaves = sorted(urls)
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Reprocessando {len(chaves)} páginas arquivadas ({len(registros)} concursos)...")
+
+        # O parsing e o matching rodam em outros processos; o event loop só
+        # espera o resultado, então o gravador do banco continua livre
+        if workers is not None:
+            scraper.CPU_WORKERS = max(0, workers)
+        loop = asyncio.get_running_loop()
+        resultados = await loop.run_in_executor(
+            None, _analisar_tudo, [arquivo.caminho(k) for k in chaves], [urls[k] for k in chaves])
+        analises = {}
+        for chave, (cargos, pdf_url, erro) in zip(chaves, resultados):
+            if erro:
+                print(f"  -> Erro ao ler a página {chave}: {erro}")
+            else:
+                analises[chave] = (cargos, pdf_url)
+
+        atuais = {entry['url']: entry for entry in scraper.data_list}
+        emitidos = 0
+        for registro in registros:
+            cargos, pdf_url = analises.get(registro['sha256'], (None, None))
+            if not cargos:
+                continue
+            atual = atuais.get(registro['url'])
+            if atual:
+                pdf_url = pdf_url or atual.get('pdf_url')
+                # Cargos achados num edital cujo texto saiu do cache não
+                # podem ser conferidos de novo: continuam valendo
+                if atual.get('pdf_url'):
+                    cargos = scraper.ordenar_cargos(
+                        set(cargos).union(c for c in atual.get('all_jobs', []) if c in scraper.get_cargo_matcher.ordem))
+                if atual.get('all_jobs') == cargos and atual.get('pdf_url') == pdf_url:
+                    continue
+            start_date, end_date = scraper.parse_date_range(registro['date'])
+            if scraper.is_expired(start_date, end_date):
+                continue
+
+            entry = scraper.montar_entrada(registro, cargos, start_date, end_date, pdf_url)
+            scraper.registrar_entrada(entry)
+            state.append_entry(entry)
+            await saida.put(entry)
+            emitidos += 1
+            print(f"  -> {'ATUALIZADO' if atual else 'ADICIONADO'}: {registro['title']} ({', '.join(cargos)})")
+        print(f"Reprocessamento finalizado! {emitidos} concursos adicionados ou atualizados.")
+    finally:
+        scraper.persist_state()
+        await scraper.exportar_estatico()
+
+async def reprocessar(diretorio=ARCHIVE_DIR, workers=None):
+    origem = lambda saida: etapa_reprocessamento(saida, diretorio, workers)
+    return await pipeline.run_pipeline(reconciliar=False, origem=origem)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprocessa as páginas arquivadas com os cargos atuais")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='workers para parsing e matching (padrão: SCRAPER_CPU_WORKERS)')
+    parser.add_argument('--dir', default=ARCHIVE_DIR, help='diretório do arquivo de páginas')
+    args = parser.parse_args(argv)
+    metrics.iniciar('reprocess')
+    try:
+        return asyncio.run(reprocessar(args.dir, args.workers))
+    finally:
+        scraper.encerrar_cpu_executor()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import sys
+import mysql.connector
+import dbpool
+from dbpool import logger
+from base import CARGOS
+
+# Cada migração é (versão, descrição, passos). Um passo é uma SQL ou uma
+# função que recebe o cursor, para os casos que precisam checar o estado
+# atual do banco antes de alterar (bases criadas pelo script do README).
+
+def _column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+def _index_exists(cursor, table, index):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+        (table, index)
+    )
+    return cursor.fetchone()[0] > 0
+
+def add_column(table, column, definition):
+    def step(cursor):
+        if not _column_exists(cursor, table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+def add_index(table, index, columns):
+    def step(cursor):
+        if not _index_exists(cursor, table, index):
+            cursor.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+    return step
+
+CREATE_CONCURSOS = """
+CREATE TABLE IF NOT EXISTS concursos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    url VARCHAR(255) UNIQUE NOT NULL,
+    state VARCHAR(50),
+    job VARCHAR(255),
+    processed_at DATETIME,
+    start_date DATE,
+    pdf_url VARCHAR(255),
+    status ENUM('Aberto', 'Encerrado', 'Cancelado') DEFAULT 'Aberto',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+)
+"""
+
+# Contagem por status mantida pelos triggers abaixo; get_status_summary lê
+# daqui em vez de fazer GROUP BY na tabela inteira
+CREATE_STATUS_COUNTS = """
+CREATE TABLE IF NOT EXISTS concursos_status_counts (
+    status VARCHAR(20) PRIMARY KEY,
+    total INT NOT NULL DEFAULT 0
+)
+"""
+
+SEED_STATUS_COUNTS = """
+INSERT INTO concursos_status_counts (status, total)
+SELECT COALESCE(status, 'Sem Status'), COUNT(*) FROM concursos GROUP BY status
+ON DUPLICATE KEY UPDATE total = VALUES(total)
+"""
+
+TRIGGER_INSERT = """
+CREATE TRIGGER concursos_status_counts_ai AFTER INSERT ON concursos FOR EACH ROW
+    INSERT INTO concursos_status_counts (status, total)
+    VALUES (COALESCE(NEW.status, 'Sem Status'), 1)
+    ON DUPLICATE KEY UPDATE total = total + 1
+"""
+
+TRIGGER_UPDATE = """
+CREATE TRIGGER concursos_status_counts_au AFTER UPDATE ON concursos FOR EACH ROW
+BEGIN
+    IF NOT (NEW.status <=> OLD.status) THEN
+        UPDATE concursos_status_counts SET total = total - 1
+        WHERE status = COALESCE(OLD.status, 'Sem Status');
+        INSERT INTO concursos_status_counts (status, total)
+        VALUES (COALESCE(NEW.status, 'Sem Status'), 1)
+        ON DUPLICATE KEY UPDATE total = total + 1;
+    END IF;
+END
+"""
+
+TRIGGER_DELETE = """
+CREATE TRIGGER concursos_status_counts_ad AFTER DELETE ON concursos FOR EACH ROW
+    UPDATE concursos_status_counts SET total = total - 1
+    WHERE status = COALESCE(OLD.status, 'Sem Status')
+"""
+
+# Dimensão de cargos (nomes de base.CARGOS, comparados byte a byte para
+# que variações de acento não colidam no UNIQUE) e o mapeamento concurso ->
+# cargos. status, state e start_date são copiados do concurso para que o
+# filtro por cargo, status e estado seja resolvido só pelo índice
+CREATE_CARGOS = """
+CREATE TABLE IF NOT EXISTS cargos (
+    id SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    nome VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    UNIQUE KEY uq_cargos_nome (nome)
+)
+"""
+
+CREATE_CONCURSO_CARGOS = """
+CREATE TABLE IF NOT EXISTS concurso_cargos (
+    concurso_id INT NOT NULL,
+    cargo_id SMALLINT UNSIGNED NOT NULL,
+    status ENUM('Aberto', 'Encerrado', 'Cancelado') DEFAULT 'Aberto',
+    state VARCHAR(50),
+    start_date DATE,
+    PRIMARY KEY (concurso_id, cargo_id),
+    KEY idx_concurso_cargos_cargo_status_state (cargo_id, status, state),
+    KEY idx_concurso_cargos_status_start (status, start_date),
+    CONSTRAINT fk_concurso_cargos_concurso FOREIGN KEY (concurso_id)
+        REFERENCES concursos (id) ON DELETE CASCADE,
+    CONSTRAINT fk_concurso_cargos_cargo FOREIGN KEY (cargo_id) REFERENCES cargos (id)
+)
+"""
+
+def seed_cargos(cursor):
+    cursor.executemany("INSERT IGNORE INTO cargos (nome) VALUES (%s)", [(nome,) for nome in CARGOS])
+
+MIGRATIONS = [
+    (1, "Tabela concursos", [CREATE_CONCURSOS]),
+    (2, "Coluna fingerprint", [add_column("concursos", "fingerprint", "CHAR(40) AFTER status")]),
+    # Atende a expiração (status = 'Aberto' AND start_date < CURDATE())
+    # e qualquer filtro por status com um range scan em vez de full scan
+    (3, "Índice de status e data", [
+        add_index("concursos", "idx_concursos_status_start", "status, start_date"),
+    ]),
+    (4, "Contagem incremental por status", [
+        CREATE_STATUS_COUNTS,
+        "DROP TRIGGER IF EXISTS concursos_status_counts_ai",
+        "DROP TRIGGER IF EXISTS concursos_status_counts_au",
+        "DROP TRIGGER IF EXISTS concursos_status_counts_ad",
+        "DELETE FROM concursos_status_counts",
+        TRIGGER_INSERT,
+        TRIGGER_UPDATE,
+        TRIGGER_DELETE,
+        SEED_STATUS_COUNTS,
+    ]),
+    # Os concursos já gravados ganham o mapeamento e o end_date no próximo
+    # sync: a fingerprint passou a incluir todos os cargos, então todos
+    # aparecem como alterados uma vez
+    (5, "Cargos normalizados, end_date e índices de busca", [
+        add_column("concursos", "end_date", "DATE AFTER start_date"),
+        CREATE_CARGOS,
+        seed_cargos,
+        CREATE_CONCURSO_CARGOS,
+        add_index("concursos", "idx_concursos_status_state", "status, state"),
+    ]),
+]
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    description VARCHAR(255),
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def applied_versions(cursor):
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate(conn):
+    cursor = conn.cursor()
+    try:
+        applied = applied_versions(cursor)
+        pending = [m for m in MIGRATIONS if m[0] not in applied]
+        for version, description, steps in pending:
+            logger.info(f"Aplicando migração {version}: {description}")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            conn.commit()
+        if not pending:
+            logger.info("Esquema do banco já está atualizado")
+        return len(pending)
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+if __name__ == "__main__":
+    import database  # configura o handler do logger 'concursos_db'
+    try:
+        dbpool.run(migrate)
+    except mysql.connector.Error as err:
+        logger.error(f"Erro ao aplicar migrações: {err}")
+        sys.exit(1)
@@ -1,90 +1,123 @@
-import os, re, json, asyncio, aiohttp, unicodedata
-from bs4 import BeautifulSoup
+import os, re, sys, asyncio, aiohttp
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
 from datetime import datetime
 from base import CARGOS
+from matcher import compilar_cargos
+from normalizer import normalizar_texto
+from parsing import parse_listagens, extrair_concurso
+from httpcache import HttpCache
+from archive import PageArchive, ARCHIVE_ENABLED
+import fetchpolicy, edital, estatico
+import state, homepage, metrics
+from checkpoint import Checkpoint
 
 BASE_URL = 'https://www.pciconcursos.com.br'
 HOME_URL = f'{BASE_URL}/concursos/'
-BASE_DIR = '/var/www/vagas/data'
-DATA_FILE = os.path.join(BASE_DIR, 'data.json')
-PROCESSED_FILE = os.path.join(BASE_DIR, 'processed.json')
 
+load_dotenv()
+
+# Limites do crawl concorrente (SCRAPER_CONCURRENCY=1 mantém o modo sequencial).
+# Todas as requisições vão para o mesmo host: por padrão o limite por host
+# acompanha a concorrência, senão ela nunca passaria dele
+MAX_CONCURRENCY = max(1, int(os.getenv('SCRAPER_CONCURRENCY', 4)))
+LIMIT_PER_HOST = max(1, int(os.getenv('SCRAPER_LIMIT_PER_HOST', MAX_CONCURRENCY)))
+
+# Cache HTTP com requisições condicionais (HTTP_CACHE=0 desliga)
+HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE', '1') != '0'
+
+# Parsing e busca de cargos fora do event loop, que fica só com o I/O.
+# SCRAPER_CPU_EXECUTOR=process usa um pool de processos (cada worker compila
+# o matcher uma vez); 'thread' é o fallback onde não dá para abrir processos.
+# SCRAPER_CPU_WORKERS=0 mantém tudo no event loop
+CPU_WORKERS = max(0, int(os.getenv('SCRAPER_CPU_WORKERS', os.cpu_count() or 1)))
+CPU_EXECUTOR = os.getenv('SCRAPER_CPU_EXECUTOR', 'process')
+
+# O aiohttp só descomprime brotli se um dos pacotes estiver instalado
+def _accept_encoding():
+    for modulo in ('brotli', 'brotlicffi'):
+        try:
+            __import__(modulo)
+            return 'gzip, deflate, br'
+        except ImportError:
+            continue
+    return 'gzip, deflate'
+
+ACCEPT_ENCODING = _accept_encoding()
+
+# processed é o índice em disco aberto por init_state (state.open_processed)
 processed = set()
 data_list = []
 
-# Função para normalizar texto
-def normalizar_texto(texto):
-    if not texto:
-        return ""
-
-    texto = unicodedata.normalize('NFD', texto)
-    texto = ''.join(char for char in texto if unicodedata.category(char) != 'Mn')
-    
-    texto = texto.lower()
-    
-    texto = re.sub(r'[^\w\s]', ' ', texto, flags=re.UNICODE)
-    texto = re.sub(r'\s+', ' ', texto)
-    
-    return texto.strip()
+# Matcher compilado uma única vez a partir de CARGOS
+def get_cargo_matcher():
+    if not hasattr(get_cargo_matcher, 'matcher'):
+        get_cargo_matcher.matcher = compilar_cargos(CARGOS, normalizar_texto)
+        get_cargo_matcher.ordem = {cargo: i for i, cargo in enumerate(CARGOS)}
+    return get_cargo_matcher.matcher
+
+# Retorna cada ocorrência de cargo com sua posição no texto normalizado
+def localizar_cargos(texto_edital):
+    return get_cargo_matcher().encontrar(normalizar_texto(texto_edital))
 
 # Função para buscar cargos de TI
 def buscar_cargos(texto_edital):
+    with metrics.span('match'):
+        cargos_encontrados = {m.rotulo for m in localizar_cargos(texto_edital)}
+    return ordenar_cargos(cargos_encontrados)
 
-    texto_normalizado = normalizar_texto(texto_edital)
-    cargos_encontrados = []
-    
-    if not hasattr(buscar_cargos, 'cargos_normalizados'):
-        buscar_cargos.cargos_normalizados = {
-            cargo: normalizar_texto(cargo) for cargo in CARGOS
-        }
-    
-    for cargo_original, cargo_normalizado in buscar_cargos.cargos_normalizados.items():
-        if cargo_normalizado in texto_normalizado:
-            cargos_encontrados.append(cargo_original)
-    
-    return list(dict.fromkeys(cargos_encontrados))
-
-# Verifica se a url já foi visitada
-def load_json_set(path):
-    if os.path.exists(path):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return set(json.load(f))
-        except Exception:
-            return set()
-    return set()
-
-def save_json_set(data_set, path):
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(list(data_set), f, ensure_ascii=False, indent=2)
-
-def load_json_list(path):
-    if os.path.exists(path):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
-
-def save_json_list(lst, path):
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(lst, f, ensure_ascii=False, indent=2)
+# Mantém a ordem de CARGOS, o primeiro vira o 'job' principal
+def ordenar_cargos(cargos):
+    get_cargo_matcher()
+    return sorted(cargos, key=get_cargo_matcher.ordem.__getitem__)
 
 def init_state():
     global processed, data_list
-    if not os.path.exists(BASE_DIR):
-        os.makedirs(BASE_DIR, exist_ok=True)
+    if not os.path.exists(state.BASE_DIR):
+        os.makedirs(state.BASE_DIR, exist_ok=True)
 
-    processed = load_json_set(PROCESSED_FILE)
-    data_list = load_json_list(DATA_FILE)
+    processed, data_list = state.load_state()
     print(f"[init_state] processed={len(processed)}, data_list={len(data_list)}")
 
+# Substitui a versão anterior do concurso (mesma url) ou acrescenta no fim,
+# marcando os shards estáticos das duas versões para a próxima exportação
+def registrar_entrada(entry):
+    estatico.marcar(entry)
+    for i, antiga in enumerate(data_list):
+        if antiga['url'] == entry['url']:
+            estatico.marcar(antiga)
+            data_list[i] = entry
+            return
+    data_list.append(entry)
+
+# Tira um concurso da base local (lista, journal e shards) e o deixa
+# pendente para sair do banco na etapa database
+def remover_entrada(url):
+    for i, antiga in enumerate(data_list):
+        if antiga['url'] == url:
+            estatico.marcar(antiga)
+            del data_list[i]
+            state.remove_entries([url])
+            state.add_removed([url])
+            return True
+    return False
+
+# Compacta o journal no snapshot data.json e descarta as urls processadas
+# cujo prazo já venceu há mais de PROCESSED_TTL_DAYS
 def persist_state():
-    save_json_set(processed, PROCESSED_FILE)
-    save_json_list(data_list, DATA_FILE)
-    print(f"[persist_state] saved processed={len(processed)}, data_list={len(data_list)}")
+    with metrics.span('persist_state'):
+        state.compact(data_list)
+        removidas = processed.evict()
+    print(f"[persist_state] saved processed={len(processed)} (expiradas: {removidas}), data_list={len(data_list)}")
+
+# Atualiza os shards estáticos ao fim de cada execução (não a cada
+# compactação), numa thread para não parar o event loop. Só os shards
+# marcados por registrar_entrada são refeitos; a cópia da lista protege a
+# exportação das entradas registradas enquanto ela roda
+async def exportar_estatico():
+    await asyncio.to_thread(estatico.exportar, list(data_list), sujos=estatico.pendentes())
 
 def parse_date_range(raw_date: str):
     m = re.search(r"(\d{2}/\d{2}/\d{4})\s*a\s*(\d{2}/\d{2}/\d{4})", raw_date)
@@ -109,120 +142,416 @@ def is_expired(start: str, end: str):
         pass
     return False
 
-async def fetch(session, url: str) -> bytes:
-    async with session.get(url, timeout=aiohttp.ClientTimeout(total=45)) as resp:
-        resp.raise_for_status()
-        return await resp.read()
+def prazo_do_concurso(start: str, end: str):
+    try:
+        if end:
+            return str_to_date(end)
+        elif start:
+            return str_to_date(start)
+    except Exception:
+        pass
+    return None
+
+def get_http_cache():
+    if not HTTP_CACHE_ENABLED:
+        return None
+    if not hasattr(get_http_cache, 'cache'):
+        get_http_cache.cache = HttpCache()
+    return get_http_cache.cache
+
+def get_page_archive():
+    if not ARCHIVE_ENABLED:
+        return None
+    if not hasattr(get_page_archive, 'archive'):
+        get_page_archive.archive = PageArchive()
+    return get_page_archive.archive
+
+# Roda num worker: recebe o HTML bruto e devolve (cargos, achou #noticia,
+# links do #noticia). O texto extraído fica no worker, só o resultado volta
+def analisar_pagina(html):
+    texto, achou_noticia, links = extrair_concurso(html)
+    return buscar_cargos(texto), achou_noticia, links
+
+# Roda num worker: extrai o texto do edital e busca os cargos nele na mesma
+# chamada. O texto volta para o cache HTTP do processo principal
+def analisar_edital(path):
+    texto, paginas = edital.extrair_texto(path)
+    return texto, paginas, buscar_cargos(texto)
+
+# 'spawn' em vez de fork: o processo pai já tem threads (banco, executor do
+# loop) e um fork herdaria locks possivelmente presos. O executor vive
+# enquanto o processo (no daemon, entre as rodadas) e é o mesmo do
+# reprocess.py
+def get_cpu_executor():
+    if CPU_WORKERS == 0:
+        return None
+    if not hasattr(get_cpu_executor, 'executor'):
+        if CPU_EXECUTOR == 'thread':
+            get_cpu_executor.executor = ThreadPoolExecutor(
+                max_workers=CPU_WORKERS, thread_name_prefix='cpu', initializer=get_cargo_matcher)
+        else:
+            try:
+                get_cpu_executor.executor = ProcessPoolExecutor(
+                    max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=get_cargo_matcher)
+            except (OSError, ImportError, NotImplementedError) as e:
+                # Sem semáforos POSIX (alguns contêineres e ambientes serverless)
+                print(f"[cpu] Pool de processos indisponível ({e}), usando threads")
+                get_cpu_executor.executor = ThreadPoolExecutor(
+                    max_workers=CPU_WORKERS, thread_name_prefix='cpu', initializer=get_cargo_matcher)
+    return get_cpu_executor.executor
+
+def encerrar_cpu_executor():
+    if hasattr(get_cpu_executor, 'executor'):
+        get_cpu_executor.executor.shutdown(wait=True)
+        del get_cpu_executor.executor
+
+# Roda no worker: func(*args) com as métricas coletadas, que voltam junto
+# com o resultado. 'metricas' repassa o METRICS do processo principal
+def executar_no_worker(metricas, func, *args):
+    metrics.ENABLED = metricas
+    with metrics.coletar() as coletadas:
+        resultado = func(*args)
+    return resultado, coletadas
+
+# Executa func(*args) no executor de CPU (ou direto, sem executor). Um worker
+# que morre (falta de memória numa página enorme) quebra o pool inteiro: o
+# primeiro a ver o erro o descarta, e o próximo uso abre outro. Outras
+# chamadas que falharam junto não descartam o pool novo
+async def em_worker(func, *args):
+    executor = get_cpu_executor()
+    if executor is None:
+        return func(*args)
+    try:
+        resultado, coletadas = await asyncio.get_running_loop().run_in_executor(
+            executor, executar_no_worker, metrics.ENABLED, func, *args)
+    except BrokenProcessPool:
+        if getattr(get_cpu_executor, 'executor', None) is executor:
+            del get_cpu_executor.executor
+            executor.shutdown(wait=False)
+        raise
+    metrics.reaplicar(coletadas)
+    return resultado
+
+# Registro de um concurso aceito, a partir da listagem e dos cargos achados
+def montar_entrada(c, cargos_encontrados, start_date, end_date, pdf_url=None):
+    return {
+        'title': c['title'],
+        'url': c['url'],
+        'state': c['state'],
+        # Usamos o primeiro cargo encontrado como 'job' principal para exibição
+        'job': cargos_encontrados[0],
+        'all_jobs': cargos_encontrados,
+        'start_date': start_date,
+        'end_date': end_date,
+        'pdf_url': pdf_url,
+        'processed_at': datetime.now().isoformat()
+    }
+
+# Editais baixados ficam aqui só enquanto o texto é extraído
+def editais_dir():
+    diretorio = os.path.join(state.BASE_DIR, 'editais')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+# Retorna (pdf_url, cargos achados nos editais). O pdf_url é o do primeiro
+# edital linkado, lido ou não; um PDF que falha (grande demais, corrompido,
+# fora do ar) só fica de fora da busca, sem derrubar o concurso
+async def buscar_cargos_editais(session, links, page_url, log=print):
+    pdfs = edital.candidatos(links, page_url)
+    if not pdfs:
+        return None, set()
+    cargos = set()
+    if edital.PDF_ENABLED:
+        cache = get_http_cache() if HTTP_CACHE_ENABLED else None
+        # Sem executor de CPU a extração continua numa thread e a busca de
+        # cargos no event loop
+        extrair = (lambda path: em_worker(analisar_edital, path)) if get_cpu_executor() else None
+        for pdf in pdfs[:edital.MAX_PDFS]:
+            try:
+                texto, achados = await edital.ler_texto(session, pdf, cache, get_fetch_policy().executar,
+                                                        editais_dir(), extrair=extrair)
+            except edital.EditalGrande as e:
+                metrics.incr('pdf_total', resultado='grande')
+                log(f"  -> Edital ignorado ({e}): {pdf}")
+                continue
+            except Exception as e:
+                metrics.incr('pdf_total', resultado='erro')
+                log(f"  -> Erro ao ler o edital {pdf}: {e}")
+                continue
+            # Texto vindo do cache HTTP (ou extraído sem executor): a busca
+            # de cargos é uma ida só ao worker
+            if achados is None:
+                achados = await em_worker(buscar_cargos, texto)
+            log(f"  -> Edital em PDF: {len(achados)} cargos de TI")
+            cargos.update(achados)
+    return edital.pdf_url(pdfs), cargos
+
+# Uma política por processo: o limite de concorrência aprendido vale para
+# todas as rodadas do daemon. É o único limite das requisições, e nunca passa
+# das conexões por host: acima disso elas só esperariam no pool do conector,
+# com a espera contada como latência do site
+def get_fetch_policy():
+    if not hasattr(get_fetch_policy, 'policy'):
+        get_fetch_policy.policy = fetchpolicy.FetchPolicy(min(MAX_CONCURRENCY, LIMIT_PER_HOST))
+    return get_fetch_policy.policy
+
+# Cada tentativa passa pela política (taxa, concorrência adaptativa, novas
+# tentativas com backoff para timeouts, erros de conexão, 429 e 5xx)
+async def fetch(session, url: str, usar_cache=True) -> bytes:
+    return await get_fetch_policy().executar(lambda: _fetch(session, url, usar_cache))
+
+# Marca um 304 cujo corpo sumiu do cache
+_SEM_CORPO = object()
+
+# Requisição condicional: um 304 devolve o corpo guardado no cache
+async def _fetch(session, url: str, usar_cache=True) -> bytes:
+    body = await _fetch_condicional(session, url, get_http_cache() if usar_cache else None)
+    if body is _SEM_CORPO:
+        # Entrada sumiu do disco entre a validação e a leitura: nova
+        # requisição, já com a conexão anterior devolvida ao pool
+        body = await _fetch_condicional(session, url, None)
+    return body
+
+async def _fetch_condicional(session, url, cache):
+    headers = {'Accept-Encoding': ACCEPT_ENCODING}
+    if cache:
+        headers.update(cache.validators(url))
+
+    with metrics.span('fetch'):
+        async with session.get(url, headers=headers, timeout=fetchpolicy.TIMEOUT) as resp:
+            metrics.incr('http_responses_total', status=resp.status)
+            if resp.status == 304 and cache:
+                body = cache.hit(url)
+                if body is None:
+                    return _SEM_CORPO
+                metrics.incr('http_cache_hits_total')
+                return body
+            resp.raise_for_status()
+            body = await resp.read()
+            metrics.incr('http_bytes_total', len(body))
+            if cache:
+                cache.store(url, body, resp.headers)
+            return body
 
 async def parse_homepage(session) -> list:
     html = await fetch(session, HOME_URL)
-    soup = BeautifulSoup(html, 'html.parser')
-    contests = []
-    for div in soup.find_all('div', attrs={'data-url': True}):
-        rel = div['data-url']
-        url = rel if rel.startswith('http') else BASE_URL + rel
-        a = div.find('a')
-        title = a.get('title', '').strip() if a else 'Sem título'
-        state = div.find('div', class_='cc').get_text(strip=True) or 'NACIONAL'
-        ce = div.find('div', class_='ce')
-        date = 'Em breve'
-        if ce and ce.find('span'):
-            raw = ''.join(ce.find('span').strings)
-            date = raw.replace('Até', '').strip()
-        contests.append({'title': title, 'url': url, 'state': state, 'date': date})
-    return contests
-
-async def process_contest(session, c, i, total):
+    return await em_worker(parse_listagens, html, BASE_URL)
+
+# Se 'fila' for informada, cada entrada nova também é enviada para ela
+# (pipeline em processo do main.py). Com forcar=True o concurso é lido de
+# novo mesmo já processado (listagem alterada na página inicial). Retorna
+# None quando a página não pôde ser lida. Com 'checkpoint', a url é marcada
+# como em andamento antes e concluída (ou com falha) depois
+async def process_contest(session, c, i, total, log=print, fila=None, forcar=False, checkpoint=None):
+    if checkpoint is None:
+        return await _process_contest(session, c, i, total, log, fila, forcar)
+    checkpoint.iniciar(c['url'])
+    resultado = await _process_contest(session, c, i, total, log, fila, forcar)
+    checkpoint.concluir(c['url'], resultado)
+    return resultado
+
+async def _process_contest(session, c, i, total, log, fila, forcar):
     url = c['url']
-    print(f"Processando {i}/{total}: {c['title']}")
+    log(f"Processando {i}/{total}: {c['title']}")
 
-    if url in processed:
-        print("  -> Já processado anteriormente")
+    if url in processed and not forcar:
+        log("  -> Já processado anteriormente")
         return False
 
-    processed.add(url)
-    persist_state()
+    start_date, end_date = parse_date_range(c['date'])
 
     try:
         # 1. Baixa o HTML da página do concurso
         html = await fetch(session, url)
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # 2. Busca apenas a div com id 'noticia'
-        noticia = soup.find(id='noticia')
-        
-        # Se não encontrar o article, usa a página inteira como fallback
-        if noticia:
-            page_text = noticia.get_text(separator=' ')
-            print("  -> Buscando cargos dentro de #noticia")
+        # Guarda a página para reprocessamentos offline (reprocess.py)
+        arquivo = get_page_archive()
+        if arquivo:
+            arquivo.guardar(c, html)
+
+        # 2. Monta apenas a div com id 'noticia' (se não encontrar, usa a
+        # página inteira como fallback) e 3. busca os cargos nesse texto,
+        # as duas coisas no executor de CPU
+        with metrics.span('analise'):
+            cargos_encontrados, achou_noticia, links = await em_worker(analisar_pagina, html)
+        if achou_noticia:
+            log("  -> Buscando cargos dentro de #noticia")
         else:
-            page_text = soup.get_text(separator=' ')
-            print("  -> Aviso: #noticia não encontrado, buscando na página inteira")
-
-        # 3. Busca os cargos diretamente neste texto
-        cargos_encontrados = buscar_cargos(page_text)
+            log("  -> Aviso: #noticia não encontrado, buscando na página inteira")
+
+        # 4. E nos editais em PDF linkados, onde muitos cargos só aparecem
+        # no quadro de vagas. Concurso expirado seria descartado de qualquer
+        # forma: não vale o download
+        expirado = is_expired(start_date, end_date)
+        pdf_url = None
+        if links and not expirado:
+            pdf_url, cargos_pdf = await buscar_cargos_editais(session, links, url, log)
+            if not cargos_pdf.issubset(cargos_encontrados):
+                cargos_encontrados = ordenar_cargos(cargos_pdf.union(cargos_encontrados))
+
+        # Só agora a url conta como processada: se o download ou o parsing
+        # falharem, a próxima execução tenta de novo. O prazo da listagem
+        # define por quanto tempo ela fica registrada
+        processed.add(url, prazo_do_concurso(start_date, end_date))
         
-        # Se não achou nada, ignora
+        # Se não achou nada, ignora. Num concurso buscado de novo (forcar),
+        # a versão gravada antes deixa de valer e sai da base
         if not cargos_encontrados:
-            print("  -> Ignorado: sem cargos de TI encontrados na página")
+            log("  -> Ignorado: sem cargos de TI encontrados na página")
+            if forcar and remover_entrada(url):
+                log("  -> REMOVIDO: a versão anterior saiu da base")
             return False
 
         # Verifica datas
-        start_date, end_date = parse_date_range(c['date'])
-        if is_expired(start_date, end_date):
-            print("  -> Ignorado: concurso expirado")
+        if expirado:
+            log("  -> Ignorado: concurso expirado")
+            if forcar and remover_entrada(url):
+                log("  -> REMOVIDO: a versão anterior saiu da base")
             return False
 
-        # Usamos o primeiro cargo encontrado como 'job' principal para exibição
-        job_title = cargos_encontrados[0]
-        
-        entry = {
-            'title': c['title'],
-            'url': c['url'],
-            'state': c['state'],
-            'job': job_title,
-            'all_jobs': cargos_encontrados,
-            'start_date': start_date,
-            'end_date': end_date,
-            'processed_at': datetime.now().isoformat()
-        }
-
-        data_list.append(entry)
-        persist_state()
+        entry = montar_entrada(c, cargos_encontrados, start_date, end_date, pdf_url)
+        job_title = entry['job']
 
-        print(f"  -> ADICIONADO: {job_title} (total: {len(cargos_encontrados)} cargos)")
+        registrar_entrada(entry)
+        state.append_entry(entry)
+        if state.needs_compaction():
+            persist_state()
+        if fila is not None:
+            await fila.put(entry)
+
+        log(f"  -> {'ATUALIZADO' if forcar else 'ADICIONADO'}: {job_title} (total: {len(cargos_encontrados)} cargos)")
         return True
 
     except Exception as e:
-        print(f"  -> Erro ao processar concurso: {e}")
-        return False
+        log(f"  -> Erro ao processar concurso: {e}")
+        return None
+
+# Garante que a saída de cada concurso apareça na ordem da página inicial,
+# mesmo quando as páginas terminam de ser processadas fora de ordem
+class ProgressoOrdenado:
+    def __init__(self):
+        self.proximo = 1
+        self.pendentes = {}
+
+    def concluir(self, i, linhas):
+        self.pendentes[i] = linhas
+        while self.proximo in self.pendentes:
+            for linha in self.pendentes.pop(self.proximo):
+                print(linha)
+            self.proximo += 1
+
+# Todas as páginas começam juntas: quantas requisições ficam em andamento é
+# decidido só pela política de requisições (get_fetch_policy), e o parsing
+# e o matching, pelo executor de CPU
+async def process_contests_concurrently(session, contests, fila=None, reprocessar=frozenset(), checkpoint=None):
+    total = len(contests)
+    progresso = ProgressoOrdenado()
+
+    async def worker(i, c):
+        linhas = []
+        try:
+            return await process_contest(session, c, i, total, log=linhas.append, fila=fila,
+                                         forcar=c['url'] in reprocessar, checkpoint=checkpoint)
+        finally:
+            progresso.concluir(i, linhas)
 
-async def check_and_process():
-    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Iniciando verificação de concursos...")
+    # processed/data_list só são alterados entre awaits no mesmo event loop,
+    # então as tarefas concorrentes não se atropelam no estado compartilhado.
+    # Devolve o resultado de cada concurso, na ordem da lista
+    return await asyncio.gather(*(worker(i, c) for i, c in enumerate(contests, 1)))
 
+def make_session(max_concurrency=MAX_CONCURRENCY):
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=LIMIT_PER_HOST)
+    return aiohttp.ClientSession(headers=headers, connector=connector)
+
+# Sem 'session', abre uma sessão só para esta execução; o daemon passa a
+# sua, que continua aberta (conexões já estabelecidas) entre as rodadas. A
+# concorrência vem só da política de requisições (SCRAPER_CONCURRENCY e
+# SCRAPER_LIMIT_PER_HOST); com limite 1 os concursos vão um por vez.
+# Com retomar=True, uma execução interrompida continua do checkpoint: as
+# mesmas listagens, só as urls que não chegaram ao fim
+async def check_and_process(fila=None, session=None, retomar=False):
+    if session is None:
+        async with make_session() as session:
+            return await check_and_process(fila, session, retomar)
+
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Iniciando verificação de concursos...")
+
+    ponto = None
+    concluida = False
+    try:
+        anterior = state.load_homepage()
+        ponto = Checkpoint.carregar() if retomar else None
+
+        if ponto is not None:
+            contests = ponto.listagens
+            pendentes, reprocessar = ponto.a_retomar({entry['url'] for entry in data_list})
+            contagem = ponto.contagem()
+            print(f"Retomando a execução iniciada em {ponto.inicio}: {contagem.get('concluido', 0)} concluídos, "
+                  f"{len(pendentes)} a processar de {len(ponto.pendentes)}")
+        else:
+            if retomar:
+                print("Nenhuma execução interrompida para retomar, começando do zero")
+            elif Checkpoint.existe():
+                print("Descartando o checkpoint de uma execução interrompida (use --resume para continuar)")
 
-    async with aiohttp.ClientSession(headers=headers) as session:
-        try:
             contests = await parse_homepage(session)
             print(f"Encontrados {len(contests)} concursos na página inicial")
 
-            new_contests = 0
-            total = len(contests)
-            for i, c in enumerate(contests, 1):
-                added = await process_contest(session, c, i, total)
-                if added:
-                    new_contests += 1
-            print(f"Processamento finalizado! {new_contests} novos concursos adicionados.")
+            # Só as listagens novas ou alteradas desde a última leitura seguem
+            # para a busca das páginas dos concursos
+            diff = homepage.comparar(anterior, contests)
+            print(f"Página inicial: {len(diff.novos)} novos, {len(diff.alterados)} alterados, {len(diff.removidos)} removidos, {diff.inalterados} sem mudança")
+            pendentes = diff.novos + diff.alterados
+            reprocessar = {c['url'] for c in diff.alterados}
+            ponto = Checkpoint.novo(contests, pendentes, reprocessar)
+
+        limite = get_fetch_policy().limite.maximo
+        if limite > 1:
+            print(f"Modo concorrente: até {limite} requisições simultâneas ({LIMIT_PER_HOST} conexões por host)")
+            await process_contests_concurrently(session, pendentes, fila, reprocessar, ponto)
+        else:
+            total = len(pendentes)
+            for i, c in enumerate(pendentes, 1):
+                await process_contest(session, c, i, total, fila=fila,
+                                      forcar=c['url'] in reprocessar, checkpoint=ponto)
 
-        except Exception as e:
-            print(f"Erro durante o processamento: {e}")
+        # Resultados da execução inteira, inclusive da parte anterior à retomada
+        resultados = ponto.resultados()
+        new_contests = sum(1 for added in resultados.values() if added)
+        print(f"Processamento finalizado! {new_contests} novos concursos adicionados ou atualizados.")
 
-def run_once():
-    asyncio.run(check_and_process())
+        falhas = {url for url, added in resultados.items() if added is None}
+        state.save_homepage(homepage.atualizar(anterior, contests, falhas))
+        concluida = True
+
+    except Exception as e:
+        print(f"Erro durante o processamento: {e}")
+
+    finally:
+        persist_state()
+        await exportar_estatico()
+        # O checkpoint só some depois que o estado local está no disco; se
+        # a execução não terminou, ele fica para o --resume
+        if ponto is not None:
+            if concluida:
+                ponto.encerrar()
+            else:
+                ponto.fechar()
+
+def run_once(retomar=False):
+    try:
+        asyncio.run(check_and_process(retomar=retomar))
+    finally:
+        encerrar_cpu_executor()
 
 if __name__ == '__main__':
+    metrics.iniciar('scraper')
     init_state()
-    run_once()
\ No newline at end of file
+    try:
+        run_once(retomar='--resume' in sys.argv[1:])
+    finally:
+        metrics.exportar()
\ No newline at end of file
@@ -0,0 +1,229 @@
+import os, json
+from processed import ProcessedStore
+from expiracao import IndiceExpiracao
+
+BASE_DIR = '/var/www/vagas/data'
+DATA_FILE = os.path.join(BASE_DIR, 'data.json')
+PROCESSED_DB = os.path.join(BASE_DIR, 'processed.db')
+# Formato antigo (lista JSON carregada inteira); importado uma vez no processed.db
+PROCESSED_FILE = os.path.join(BASE_DIR, 'processed.json')
+JOURNAL_FILE = os.path.join(BASE_DIR, 'state.jsonl')
+HOMEPAGE_FILE = os.path.join(BASE_DIR, 'homepage.json')
+# Checkpoint da execução em andamento (checkpoint.py), para --resume
+CHECKPOINT_FILE = os.path.join(BASE_DIR, 'crawl.jsonl')
+# Índice dos registros da base por vencimento, usado pela limpeza
+EXPIRY_DB = os.path.join(BASE_DIR, 'expiracao.db')
+# Regravado a cada escrita no banco; a API descarta o cache quando ele muda
+DB_VERSION_FILE = os.path.join(BASE_DIR, 'db_version.json')
+# Urls que saíram da base local e ainda precisam sair do MySQL
+REMOVED_FILE = os.path.join(BASE_DIR, 'removidos.json')
+
+# Quantidade de registros no journal que dispara uma compactação
+COMPACT_EVERY = max(1, int(os.getenv('STATE_COMPACT_EVERY', 500)))
+
+_journal = None
+_journal_count = 0
+_expiracao = None
+
+# Escreve o arquivo inteiro em um temporário e troca de nome só no final,
+# assim um crash no meio da escrita nunca deixa o arquivo pela metade.
+# json.dumps sem indent usa o encoder em C; json.dump (em partes, direto no
+# arquivo) e o indent caem no encoder em Python, várias vezes mais lento
+def atomic_write_json(obj, path, indent=2):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(obj, ensure_ascii=False, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path))
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _read_json(path, default, strict):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        if strict:
+            raise
+        return default
+
+# Lê o journal linha a linha; uma linha incompleta no final (escrita
+# interrompida por um crash) encerra a leitura sem invalidar o resto
+def read_journal(path=None):
+    path = path or JOURNAL_FILE
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+# 'processed' só aparece em journals gravados antes do processed.db;
+# 'remove' tira da base uma url gravada antes (no snapshot ou no journal)
+def _replay(processed, data_list):
+    # Entradas são indexadas pela url: a última versão registrada vence
+    entries = {entry['url']: entry for entry in data_list}
+    urls = []
+    for record in read_journal():
+        op = record.get('op')
+        if op == 'processed':
+            urls.append(record['url'])
+        elif op == 'entry':
+            entry = record['entry']
+            entries[entry['url']] = entry
+        elif op == 'remove':
+            entries.pop(record['url'], None)
+    processed.update(urls)
+    return processed, list(entries.values())
+
+def exists():
+    return os.path.exists(DATA_FILE) or os.path.exists(JOURNAL_FILE)
+
+# Abre o índice de urls processadas, importando o processed.json antigo na
+# primeira vez (o arquivo é renomeado para não ser importado de novo)
+def open_processed():
+    processed = ProcessedStore(PROCESSED_DB)
+    if os.path.exists(PROCESSED_FILE):
+        legado = _read_json(PROCESSED_FILE, [], strict=False)
+        processed.update(legado)
+        os.replace(PROCESSED_FILE, f"{PROCESSED_FILE}.migrado")
+    return processed
+
+def load_state():
+    global _journal_count
+    processed = open_processed()
+    data_list = _read_json(DATA_FILE, [], strict=False)
+    _journal_count = sum(1 for _ in read_journal())
+    processed, data_list = _replay(processed, data_list)
+    processed.evict()
+    return processed, data_list
+
+def load_data():
+    if not exists():
+        raise FileNotFoundError(DATA_FILE)
+    data_list = _read_json(DATA_FILE, [], strict=True)
+    return _replay(set(), data_list)[1]
+
+# Descarta uma linha incompleta deixada por um crash antes de voltar a
+# anexar registros, senão o próximo registro seria colado nela
+def _truncate_torn_tail(path):
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        content = f.read()
+        if content and not content.endswith(b'\n'):
+            f.truncate(content.rfind(b'\n') + 1)
+
+# Sem load_state (o cleaner avulso), o journal existente é contado ao ser
+# aberto, para que needs_compaction valha também nesses processos
+def _append(*records):
+    global _journal, _journal_count
+    if _journal is None:
+        os.makedirs(os.path.dirname(JOURNAL_FILE), exist_ok=True)
+        _truncate_torn_tail(JOURNAL_FILE)
+        if not _journal_count:
+            _journal_count = sum(1 for _ in read_journal())
+        _journal = open(JOURNAL_FILE, 'a', encoding='utf-8')
+    for record in records:
+        _journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+    _journal.flush()
+    _journal_count += len(records)
+
+# O índice de vencimento é atualizado antes do journal: se o processo cair
+# entre os dois, sobra no índice uma url a mais, que a limpeza ignora
+def append_entry(entry):
+    indice_expiracao().registrar(entry)
+    _append({'op': 'entry', 'entry': entry})
+
+# Remove urls da base sem regravar o snapshot: uma marca 'remove' por url no
+# journal, aplicada no replay até a próxima compactação. Aqui o índice é atualizado depois do journal, pelo mesmo
+# motivo: uma url a mais no índice é inofensiva, uma a menos nunca venceria
+def remove_entries(urls):
+    urls = list(urls)
+    if not urls:
+        return
+    _append(*({'op': 'remove', 'url': url} for url in urls))
+    indice_expiracao().remover(urls)
+
+# Remoções pendentes para a etapa database (database.aplicar_remocoes). Ficam
+# num arquivo porque, no modo --subprocess, quem remove e quem grava no banco
+# são processos diferentes
+def load_removed():
+    return set(_read_json(REMOVED_FILE, [], strict=False))
+
+def add_removed(urls):
+    os.makedirs(os.path.dirname(REMOVED_FILE), exist_ok=True)
+    atomic_write_json(sorted(load_removed().union(urls)), REMOVED_FILE, indent=None)
+
+# Descarta só as urls já tratadas: outras podem ter sido acrescentadas
+# enquanto o banco era atualizado
+def clear_removed(urls):
+    restantes = load_removed().difference(urls)
+    if restantes:
+        atomic_write_json(sorted(restantes), REMOVED_FILE, indent=None)
+    elif os.path.exists(REMOVED_FILE):
+        os.remove(REMOVED_FILE)
+
+# Abre o índice de vencimento. Sem nenhuma base gravada ainda, o índice vazio
+# já está em dia; senão ele é montado na primeira limpeza
+def indice_expiracao():
+    global _expiracao
+    if _expiracao is None or _expiracao.path != EXPIRY_DB:
+        novo = not os.path.exists(EXPIRY_DB)
+        _expiracao = IndiceExpiracao(EXPIRY_DB)
+        if novo and not exists():
+            _expiracao.marcar(DATA_FILE)
+    return _expiracao
+
+def needs_compaction():
+    return _journal_count >= COMPACT_EVERY
+
+def _close_journal():
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+
+# Grava o snapshot completo e só então descarta o journal. Se o processo
+# cair entre as duas etapas, o replay do journal é idempotente. As urls
+# processadas já vão direto para o processed.db e não passam por aqui
+def compact(data_list):
+    global _journal_count
+    _close_journal()
+    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
+    # O índice só acompanha o novo snapshot se descrevia o anterior
+    indice = indice_expiracao()
+    em_dia = indice.em_dia(DATA_FILE)
+    atomic_write_json(data_list, DATA_FILE, indent=None)
+    if em_dia:
+        indice.marcar(DATA_FILE)
+    if os.path.exists(JOURNAL_FILE):
+        os.remove(JOURNAL_FILE)
+    _journal_count = 0
+
+# Última versão vista da página inicial (url -> assinatura da listagem),
+# usada para só buscar de novo os concursos novos ou alterados
+def load_homepage():
+    return _read_json(HOMEPAGE_FILE, {}, strict=False)
+
+def save_homepage(snapshot):
+    os.makedirs(os.path.dirname(HOMEPAGE_FILE), exist_ok=True)
+    atomic_write_json(snapshot, HOMEPAGE_FILE, indent=None)
@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 
+import argparse
 import subprocess
 import sys
 import os
 from datetime import datetime
 
+CORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "core")
+
 # Pipeline para execução dos scripts de vagas
-def run_script(script_name, description):
+def run_script(script_name, description, args=()):
     print(f"\n{'='*60}")
     print(f"Iniciando: {description}")
     print(f"Script: {script_name}")
@@ -16,11 +19,11 @@ def run_script(script_name, description):
     # Tenta executar o script e mostra informações de erro, caso necessário
     try:
         subprocess.run(
-            [sys.executable, script_name],
+            [sys.executable, script_name, *args],
             check=True,
             capture_output=False,
             text=True,
-            cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), "core")
+            cwd=CORE_DIR
         )
         
         print(f"\n✓ {description} executado com sucesso!")
@@ -41,8 +44,55 @@ def run_script(script_name, description):
         print(f"\n✗ Erro inesperado ao executar {description}: {e}")
         return False
 
-# Função principal que executa o pipeline
-def main():
+# Pipeline em processo: scraper, limpeza e banco ligados por filas asyncio,
+# sem subprocessos nem idas e vindas pelo data.json
+def run_in_process(retomar=False):
+    print(f"\n{'#'*70}")
+    print("INICIANDO PIPELINE EM PROCESSO")
+    print(f"Data/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'#'*70}")
+
+    if CORE_DIR not in sys.path:
+        sys.path.insert(0, CORE_DIR)
+    try:
+        import pipeline
+    except ImportError as e:
+        print(f"\n✗ Pipeline em processo indisponível ({e}), usando subprocessos")
+        return main(retomar)
+
+    success = pipeline.main(retomar)
+
+    print(f"\n{'#'*70}")
+    print("PIPELINE CONCLUÍDO COM SUCESSO!" if success else "PIPELINE INTERROMPIDO!")
+    print(f"Data/Hora final: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'#'*70}")
+    return success
+
+# Modo daemon: um único processo que fica de pé e agenda as verificações,
+# em vez de o cron iniciar o pipeline do zero a cada execução
+def run_daemon():
+    if CORE_DIR not in sys.path:
+        sys.path.insert(0, CORE_DIR)
+    import daemon
+    return daemon.main()
+
+# Reaplica a busca de cargos às páginas arquivadas (após mudar base.CARGOS)
+def run_reprocess():
+    if CORE_DIR not in sys.path:
+        sys.path.insert(0, CORE_DIR)
+    import reprocess
+    return reprocess.main([])
+
+# API JSON de leitura para o site (core/api.py)
+def run_api():
+    if CORE_DIR not in sys.path:
+        sys.path.insert(0, CORE_DIR)
+    import api
+    return api.main([])
+
+# Função principal que executa o pipeline. Com retomar=True o scraper
+# continua a execução interrompida (--resume)
+def main(retomar=False):
     print(f"\n{'#'*70}")
     print("INICIANDO PIPELINE DE PROCESSAMENTO")
     print(f"Data/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -52,7 +102,8 @@ def main():
     scripts = [
         {
             "file": "scraper.py",
-            "description": "Scraper - Coleta de concursos do PCI Concursos"
+            "description": "Scraper - Coleta de concursos do PCI Concursos",
+            "args": ["--resume"] if retomar else []
         },
         {
             "file": "cleaner.py", 
@@ -67,7 +118,7 @@ def main():
     # Verifica se todos os scripts existem antes de começar
     missing_scripts = []
     for script in scripts:
-        if not os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), "core", script["file"])):
+        if not os.path.exists(os.path.join(CORE_DIR, script["file"])):
             missing_scripts.append(script["file"])
     
     if missing_scripts:
@@ -79,7 +130,7 @@ def main():
     for i, script in enumerate(scripts, 1):
         print(f"\n[Etapa {i}/3] Executando: {script['description']}")
         
-        success = run_script(script["file"], script["description"])
+        success = run_script(script["file"], script["description"], script.get("args", ()))
         
         if not success:
             print(f"\n{'!'*70}")
@@ -101,6 +152,26 @@ def main():
     return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline de concursos de TI")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="executa scraper, cleaner e database como scripts separados (modo antigo)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="fica em execução e agenda verificações rápidas e completas (substitui o cron)")
+    parser.add_argument("--reprocess", action="store_true",
+                        help="reprocessa as páginas arquivadas com os cargos atuais, sem baixar nada")
+    parser.add_argument("--api", action="store_true",
+                        help="sobe a API JSON de leitura dos concursos (API_HOST/API_PORT)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continua o crawl de uma execução interrompida a partir do checkpoint")
+    args = parser.parse_args()
+
     # Configura para mostrar todas as saídas dos scripts em tempo real
-    success = main()
+    if args.daemon:
+        success = run_daemon()
+    elif args.reprocess:
+        success = run_reprocess()
+    elif args.api:
+        success = run_api()
+    else:
+        success = main(args.resume) if args.subprocess else run_in_process(args.resume)
     sys.exit(0 if success else 1)
\ No newline at end of file
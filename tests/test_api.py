@@ -0,0 +1,245 @@
+"""Testes da API de leitura (core/api.py) contra o banco SQLite local dos
+benchmarks (benchmarks/bancolocal.py), com o cliente de testes do aiohttp.
+
+Uso: python -m pytest -q tests
+"""
+import os, sys, gzip, shutil, asyncio, tempfile, unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from bancolocal import ConexaoLocal, PoolLocal  # noqa: E402  (coloca core/ no sys.path)
+import api, consultas, database, dbpool, state  # noqa: E402
+
+ESTADOS = ['SP', 'RJ', 'MG']
+
+# 'abertos' com start_date futura, 'encerrados' com start_date passada
+def registros(abertos, encerrados=0, inicio=0):
+    hoje = date.today()
+    lista = []
+    for i in range(inicio, inicio + abertos + encerrados):
+        dias = 30 if i < inicio + abertos else -30
+        lista.append({
+            'title': f'Concurso {i}',
+            'url': f'https://exemplo/concurso-{i}',
+            'state': ESTADOS[i % len(ESTADOS)],
+            'job': 'analista de sistemas',
+            'all_jobs': ['analista de sistemas', 'técnico em informática'] if i % 2 else ['analista de sistemas'],
+            'start_date': (hoje + timedelta(days=dias)).strftime('%d/%m/%Y'),
+            'end_date': None,
+            'processed_at': datetime.now().isoformat(),
+        })
+    return lista
+
+class TestApi(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.diretorio = tempfile.mkdtemp(prefix='test_api_')
+        self.versao_original = state.DB_VERSION_FILE
+        self.intervalo_original = api.VERSAO_INTERVALO
+        state.DB_VERSION_FILE = os.path.join(self.diretorio, 'db_version.json')
+        api.VERSAO_INTERVALO = 0
+
+        database.logger.disabled = True
+        self.conexao = ConexaoLocal()
+        self.inserir(registros(75, 20))
+        # Uma thread: a conexão SQLite é uma só
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        loop = asyncio.get_running_loop()
+
+        def consultar(func, *params):
+            return loop.run_in_executor(self.executor, partial(func, self.conexao, *params))
+
+        cache = api.CacheRespostas(ttl=60, versao_path=state.DB_VERSION_FILE)
+        self.client = TestClient(TestServer(api.criar_app(consultar, cache)), auto_decompress=False)
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.executor.shutdown(wait=True)
+        self.conexao.close()
+        database.logger.disabled = False
+        state.DB_VERSION_FILE = self.versao_original
+        api.VERSAO_INTERVALO = self.intervalo_original
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def inserir(self, lista):
+        database.insert_data(self.conexao, lista)
+
+    def ids_no_banco(self, status=None):
+        sql, params = "SELECT id FROM concursos", ()
+        if status:
+            sql, params = sql + " WHERE status = ?", (status,)
+        return sorted((linha[0] for linha in self.conexao.db.execute(sql, params)), reverse=True)
+
+    async def obter_json(self, caminho, **kwargs):
+        resp = await self.client.get(caminho, headers={'Accept-Encoding': 'identity'}, **kwargs)
+        self.assertEqual(resp.status, 200)
+        return await resp.json()
+
+    async def paginar(self, caminho):
+        ids = []
+        cursor = None
+        while True:
+            dados = await self.obter_json(caminho + (f'&cursor={cursor}' if cursor else ''))
+            ids.extend(concurso['id'] for concurso in dados['concursos'])
+            cursor = dados['proximo']
+            if not cursor:
+                return ids
+
+    async def test_paginacao_por_cursor_sem_repetir_nem_pular(self):
+        for limite in (1, 7, 10, 95, 200):
+            with self.subTest(limite=limite):
+                self.assertEqual(await self.paginar(f'/concursos?status=Todos&limite={limite}'), self.ids_no_banco())
+        self.assertEqual(await self.paginar('/concursos?limite=10'), self.ids_no_banco('Aberto'))
+        ids = await self.paginar('/concursos?cargo=técnico em informática&state=SP&limite=4')
+        self.assertTrue(ids)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    async def test_if_none_match_devolve_304(self):
+        for encoding in ('identity', 'gzip'):
+            with self.subTest(encoding=encoding):
+                headers = {'Accept-Encoding': encoding}
+                resp = await self.client.get('/concursos?status=Todos&limite=100', headers=headers)
+                self.assertEqual(resp.status, 200)
+                etag = resp.headers['ETag']
+
+                resp = await self.client.get('/concursos?status=Todos&limite=100',
+                                             headers=dict(headers, **{'If-None-Match': etag}))
+                self.assertEqual(resp.status, 304)
+                self.assertEqual(await resp.read(), b'')
+                self.assertEqual(resp.headers['ETag'], etag)
+
+                resp = await self.client.get('/concursos?status=Todos&limite=100',
+                                             headers=dict(headers, **{'If-None-Match': '"outro"'}))
+                self.assertEqual(resp.status, 200)
+
+    async def test_gzip_so_para_quem_aceita(self):
+        caminho = '/concursos?status=Todos&limite=100'
+        resp = await self.client.get(caminho, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', resp.headers)
+        corpo = await resp.read()
+        etag = resp.headers['ETag']
+
+        resp = await self.client.get(caminho, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(resp.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(await resp.read()), corpo)
+        # Representações diferentes, ETags diferentes
+        self.assertNotEqual(resp.headers['ETag'], etag)
+        self.assertEqual(resp.headers['Vary'], 'Accept-Encoding')
+
+        # O ETag do corpo sem compressão não vale para o gzip, e vice-versa
+        resp = await self.client.get(caminho, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(resp.status, 200)
+
+        # Corpo pequeno demais para compensar o gzip
+        resp = await self.client.get('/estados', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', resp.headers)
+
+    async def test_cache_invalidado_apos_sinalizar_alteracao(self):
+        antes = await self.obter_json('/estados')
+        idas = self.conexao.idas
+        self.assertEqual(await self.obter_json('/estados'), antes)
+        self.assertEqual(self.conexao.idas, idas)
+
+        # insert_data chama database.sinalizar_alteracao ao gravar
+        self.inserir(registros(6, inicio=1000))
+        depois = await self.obter_json('/estados')
+        self.assertEqual(sum(e['total'] for e in depois['estados']), sum(e['total'] for e in antes['estados']) + 6)
+
+        # Uma alteração feita por fora só aparece depois do sinal
+        self.conexao.db.execute("DELETE FROM concursos WHERE url LIKE 'https://exemplo/concurso-10__'")
+        self.conexao.db.commit()
+        self.assertEqual(await self.obter_json('/estados'), depois)
+        database.sinalizar_alteracao()
+        self.assertEqual(await self.obter_json('/estados'), antes)
+
+    async def test_status_todos_nas_contagens(self):
+        abertos = await self.obter_json('/estados')
+        todos = await self.obter_json('/estados?status=Todos')
+        encerrados = await self.obter_json('/estados?status=Encerrado')
+        total = lambda dados, chave: sum(linha['total'] for linha in dados[chave])
+        self.assertEqual(total(abertos, 'estados'), 75)
+        self.assertEqual(total(encerrados, 'estados'), 20)
+        self.assertEqual(total(todos, 'estados'), 95)
+
+        abertos = await self.obter_json('/cargos?state=SP')
+        todos = await self.obter_json('/cargos?state=SP&status=todos')
+        self.assertGreater(total(todos, 'cargos'), total(abertos, 'cargos'))
+        esperado = self.conexao.db.execute(
+            "SELECT COUNT(*) FROM concurso_cargos WHERE state = 'SP'").fetchone()[0]
+        self.assertEqual(total(todos, 'cargos'), esperado)
+
+    async def test_cargo_sem_diferenca_de_acento_nem_caixa(self):
+        esperado = await self.obter_json('/concursos?cargo=técnico em informática&status=Todos&limite=200')
+        self.assertTrue(esperado['concursos'])
+        for cargo in ('Técnico em Informática', 'tecnico em informatica', ' TECNICO  EM  INFORMATICA '):
+            with self.subTest(cargo=cargo):
+                self.assertEqual(await self.obter_json(f'/concursos?cargo={cargo}&status=Todos&limite=200'), esperado)
+        vazio = await self.obter_json('/concursos?cargo=astronauta&status=Todos')
+        self.assertEqual(vazio['concursos'], [])
+
+    async def test_parametros_invalidos_devolvem_400(self):
+        for caminho in ('/concursos?cursor=!!!', '/concursos?cursor=YWJj', '/concursos?limite=abc',
+                        '/concursos?limite=0', '/concursos?limite=201', '/concursos?status=Suspenso',
+                        '/cargos?status=Suspenso', '/estados?status=x'):
+            with self.subTest(caminho=caminho):
+                resp = await self.client.get(caminho)
+                self.assertEqual(resp.status, 400)
+                self.assertIn('erro', await resp.json())
+
+# Consultas pelo caminho de produção (consultar_pool -> dbpool.run ->
+# dbpool.connection()), com um pool de uma conexão a um banco em arquivo:
+# a conexão devolvida ao pool não pode levar junto o snapshot da leitura
+class TestApiPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.diretorio = tempfile.mkdtemp(prefix='test_api_pool_')
+        self.versao_original = state.DB_VERSION_FILE
+        self.intervalo_original = api.VERSAO_INTERVALO
+        self.pool_original = dbpool._pool
+        state.DB_VERSION_FILE = os.path.join(self.diretorio, 'db_version.json')
+        api.VERSAO_INTERVALO = 0
+
+        database.logger.disabled = True
+        caminho = os.path.join(self.diretorio, 'vagas.db')
+        self.escritor = ConexaoLocal(caminho=caminho)
+        database.insert_data(self.escritor, registros(10))
+        dbpool._pool = PoolLocal(caminho)
+
+        cache = api.CacheRespostas(ttl=60, versao_path=state.DB_VERSION_FILE)
+        self.client = TestClient(TestServer(api.criar_app(cache=cache)))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        for conexao in dbpool._pool.livres:
+            conexao.close()
+        self.escritor.close()
+        dbpool._pool = self.pool_original
+        database.logger.disabled = False
+        state.DB_VERSION_FILE = self.versao_original
+        api.VERSAO_INTERVALO = self.intervalo_original
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    async def total(self):
+        resp = await self.client.get('/estados')
+        self.assertEqual(resp.status, 200)
+        return sum(e['total'] for e in (await resp.json())['estados'])
+
+    async def test_consulta_depois_da_gravacao_ve_os_dados_novos(self):
+        self.assertEqual(await self.total(), 10)
+        # Outra conexão grava e sinaliza; a consulta seguinte reusa a mesma
+        # conexão do pool
+        database.insert_data(self.escritor, registros(5, inicio=100))
+        self.assertEqual(await self.total(), 15)
+
+    def test_dbpool_run_sem_snapshot_antigo(self):
+        total = lambda: sum(n for _, n in dbpool.run(consultas.contagem_por_estado, None))
+        self.assertEqual(total(), 10)
+        self.escritor.db.execute("DELETE FROM concursos WHERE url LIKE 'https://exemplo/concurso-_'")
+        self.assertEqual(total(), 0)
+
+if __name__ == '__main__':
+    unittest.main()